@@ -17,6 +17,7 @@ import os
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from schedulers.attendance_reminder_scheduler import register_attendance_reminder_job
+from services.locationtracking_service import start_tracking_coordinates_backfill
 import time
 from datetime import datetime, timezone as dt_timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
@@ -760,6 +761,7 @@ with app.app_context():
         logger.info("Database bootstrap initialized successfully")
         logger.info("Running database migrations...")
         run_migrations()
+        start_tracking_coordinates_backfill()
         logger.info("✓ Database initialized successfully")
     except Exception as e:
         logger.error(f"✗ Database initialization failed: {e}")
@@ -61,6 +61,10 @@ class Config:
     DATABASE_NAME = os.getenv('DATABASE_NAME', 'Intimation')
     DATABASE_USER = os.getenv('DATABASE_USER', 'postgres')
     DATABASE_PASSWORD = os.getenv('DATABASE_PASSWORD', 'postgres')
+    # psycopg2 closes returned connections beyond DB_POOL_MIN, so this is
+    # also how many stay open per process for concurrent checkouts.
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 5))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 20))
     
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key-change-in-production')
@@ -84,6 +88,10 @@ class Config:
     WHATSAPP_LEAVE_STATUS_TEMPLATE = os.getenv('WHATSAPP_LEAVE_STATUS_TEMPLATE', 'fawnix_notification')
     WHATSAPP_LEAVE_MANAGER_ACTION_TEMPLATE = os.getenv('WHATSAPP_LEAVE_MANAGER_ACTION_TEMPLATE', 'fawnix_notification')
     WHATSAPP_EXCEPTION_TEMPLATE = os.getenv('WHATSAPP_EXCEPTION_TEMPLATE', 'fawnix_notes')
+    WHATSAPP_HTTP_POOL_SIZE = int(os.getenv('WHATSAPP_HTTP_POOL_SIZE', 50))
+    WHATSAPP_RATE_LIMIT_PER_SEC = float(os.getenv('WHATSAPP_RATE_LIMIT_PER_SEC', 50))
+    WHATSAPP_RATE_LIMIT_BURST = int(os.getenv('WHATSAPP_RATE_LIMIT_BURST', 100))
+    WHATSAPP_MAX_CONCURRENT_SENDS = int(os.getenv('WHATSAPP_MAX_CONCURRENT_SENDS', 20))
     FIREBASE_SERVICE_ACCOUNT_PATH = os.getenv(
         'FIREBASE_CREDENTIALS_JSON',
         os.getenv(
@@ -4,10 +4,15 @@ Database connection, bootstrap, and migration management.
 
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Dict, Tuple
 import logging
+import os
+import select
+import threading
+import time
 
 import psycopg2
-from psycopg2 import pool
+from psycopg2 import pool, sql
 from psycopg2.extras import RealDictCursor
 
 from config import Config
@@ -15,6 +20,8 @@ from config import Config
 logger = logging.getLogger(__name__)
 
 connection_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
 MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
 
 
@@ -27,71 +34,182 @@ def _print_db_login_config():
     print("DB_PASSWORD_LENGTH =", len(Config.DATABASE_PASSWORD or ""))
 
 
-def initialize_connection_pool(min_conn=2, max_conn=10):
-    """Initialize PostgreSQL connection pool."""
-    global connection_pool
+def _connect():
+    return psycopg2.connect(
+        host=Config.DATABASE_HOST,
+        port=Config.DATABASE_PORT,
+        database=Config.DATABASE_NAME,
+        user=Config.DATABASE_USER,
+        password=Config.DATABASE_PASSWORD,
+        cursor_factory=RealDictCursor,
+    )
 
-    try:
-        _print_db_login_config()
-        connection_pool = psycopg2.pool.SimpleConnectionPool(
-            min_conn,
-            max_conn,
-            host=Config.DATABASE_HOST,
-            port=Config.DATABASE_PORT,
-            database=Config.DATABASE_NAME,
-            user=Config.DATABASE_USER,
-            password=Config.DATABASE_PASSWORD,
-            cursor_factory=RealDictCursor,
-        )
 
-        if connection_pool:
-            logger.info("Connection pool created (min=%s, max=%s)", min_conn, max_conn)
+def initialize_connection_pool(min_conn=None, max_conn=None):
+    """Initialize the process-wide PostgreSQL connection pool."""
+    global connection_pool, _pool_pid
+
+    min_conn = Config.DB_POOL_MIN if min_conn is None else min_conn
+    max_conn = Config.DB_POOL_MAX if max_conn is None else max_conn
+
+    with _pool_lock:
+        if connection_pool and _pool_pid == os.getpid():
             return True
 
-        logger.error("Failed to create connection pool")
-        return False
-    except Exception as exc:
-        logger.error("Error creating connection pool: %s", exc)
-        return False
+        try:
+            _print_db_login_config()
+            connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                min_conn,
+                max_conn,
+                host=Config.DATABASE_HOST,
+                port=Config.DATABASE_PORT,
+                database=Config.DATABASE_NAME,
+                user=Config.DATABASE_USER,
+                password=Config.DATABASE_PASSWORD,
+                cursor_factory=RealDictCursor,
+            )
+            _pool_pid = os.getpid()
+            logger.info("Connection pool created (min=%s, max=%s)", min_conn, max_conn)
+            return True
+        except Exception as exc:
+            logger.error("Error creating connection pool: %s", exc)
+            return False
 
 
 def close_connection_pool():
     """Close all connections in the pool."""
     global connection_pool
 
-    if connection_pool:
-        connection_pool.closeall()
-        logger.info("Connection pool closed")
+    with _pool_lock:
+        if connection_pool and _pool_pid == os.getpid():
+            connection_pool.closeall()
+            logger.info("Connection pool closed")
+        connection_pool = None
 
 
 def get_db_connection():
-    """Get a database connection from the pool or create one directly."""
+    """Check out a pooled connection, creating the pool on first use.
+
+    Callers must hand the connection back with return_connection(). When the
+    pool cannot be created or is exhausted, a direct connection is opened
+    instead; return_connection() closes those rather than pooling them.
+
+    The pool is per process: a worker forked after the master touched the
+    database (gunicorn --preload) builds its own instead of sharing sockets.
+    """
     try:
-        _print_db_login_config()
-        if connection_pool:
-            conn = connection_pool.getconn()
-            if conn:
-                return conn
-
-        return psycopg2.connect(
-            host=Config.DATABASE_HOST,
-            port=Config.DATABASE_PORT,
-            database=Config.DATABASE_NAME,
-            user=Config.DATABASE_USER,
-            password=Config.DATABASE_PASSWORD,
-            cursor_factory=RealDictCursor,
-        )
+        if (connection_pool and _pool_pid == os.getpid()) or initialize_connection_pool():
+            try:
+                return connection_pool.getconn()
+            except pool.PoolError:
+                logger.warning("Connection pool exhausted; opening a direct connection")
+
+        return _connect()
     except Exception as exc:
         logger.error("Database connection error: %s", exc)
         raise
 
 
+def create_listen_connection(channel: str):
+    """Open a dedicated autocommit connection subscribed to a NOTIFY channel.
+
+    LISTEN sessions are held open indefinitely, so they never come from the
+    shared pool.
+    """
+    conn = _connect()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+    return conn
+
+
+# channel -> (listener thread, pid that started it)
+_LISTENERS: Dict[str, Tuple[threading.Thread, int]] = {}
+_LISTENERS_LOCK = threading.Lock()
+# channel -> pid whose listener currently holds a LISTEN session
+_SUBSCRIBED: Dict[str, int] = {}
+
+
+def is_notify_subscribed(channel: str) -> bool:
+    """Whether this process currently has a live LISTEN session on channel."""
+    return _SUBSCRIBED.get(channel) == os.getpid()
+
+
+def start_notify_listener(
+    channel: str,
+    on_notify: Callable[[str], None],
+    on_resync: Callable[[], None],
+) -> None:
+    """Start this process's background LISTEN thread for channel, once.
+
+    on_notify(payload) runs for every NOTIFY. on_resync() runs whenever the
+    subscription starts or is lost, since anything cached while not
+    subscribed may be stale.
+
+    Threads do not survive fork (gunicorn --preload), so listeners are keyed
+    on the pid that started them and a forked worker starts its own.
+    """
+    pid = os.getpid()
+    current = _LISTENERS.get(channel)
+    if current and current[1] == pid and current[0].is_alive():
+        return
+
+    with _LISTENERS_LOCK:
+        current = _LISTENERS.get(channel)
+        if current and current[1] == pid and current[0].is_alive():
+            return
+        thread = threading.Thread(
+            target=_listen_for_notifies,
+            args=(channel, on_notify, on_resync),
+            name=f"{channel}-listener",
+            daemon=True,
+        )
+        _LISTENERS[channel] = (thread, pid)
+        thread.start()
+    logger.info("Listener started on channel '%s'", channel)
+
+
+def _listen_for_notifies(channel, on_notify, on_resync, poll_timeout=60.0, retry_delay=5.0):
+    while True:
+        conn = None
+        try:
+            conn = create_listen_connection(channel)
+            on_resync()
+            _SUBSCRIBED[channel] = os.getpid()
+            while True:
+                if select.select([conn], [], [], poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    on_notify(conn.notifies.pop(0).payload)
+        except Exception as exc:
+            _SUBSCRIBED.pop(channel, None)
+            logger.warning("Listener on '%s' failed, retrying in %ss: %s", channel, retry_delay, exc)
+            on_resync()
+            time.sleep(retry_delay)
+        finally:
+            if conn:
+                conn.close()
+
+
 def return_connection(conn):
-    """Return a connection to the pool."""
-    if connection_pool and conn:
-        connection_pool.putconn(conn)
-    elif conn:
-        conn.close()
+    """Return a connection to the pool, or close it if it was not pooled."""
+    if not conn:
+        return
+
+    if connection_pool:
+        # putconn() keeps an idle connection's session as it is; callers that
+        # switched to autocommit must not hand that mode to the next borrower.
+        if not conn.closed and conn.autocommit:
+            conn.autocommit = False
+        try:
+            connection_pool.putconn(conn)
+            return
+        except pool.PoolError:
+            # Direct overflow connection from get_db_connection().
+            pass
+
+    conn.close()
 
 
 @contextmanager
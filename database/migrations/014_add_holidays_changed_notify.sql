@@ -0,0 +1,33 @@
+-- Notify listeners whenever organization holidays change so per-process
+-- holiday caches (services.leaves_service) can drop the affected year.
+-- Payload is the affected year; an empty payload means "all years".
+
+CREATE OR REPLACE FUNCTION notify_holidays_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('holidays_changed', '');
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('holidays_changed', EXTRACT(YEAR FROM NEW.holiday_date)::INT::TEXT);
+    END IF;
+
+    IF TG_OP = 'DELETE'
+       OR (TG_OP = 'UPDATE' AND EXTRACT(YEAR FROM OLD.holiday_date) <> EXTRACT(YEAR FROM NEW.holiday_date)) THEN
+        PERFORM pg_notify('holidays_changed', EXTRACT(YEAR FROM OLD.holiday_date)::INT::TEXT);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_organization_holidays_notify ON organization_holidays;
+CREATE TRIGGER trg_organization_holidays_notify
+AFTER INSERT OR UPDATE OR DELETE ON organization_holidays
+FOR EACH ROW EXECUTE FUNCTION notify_holidays_changed();
+
+DROP TRIGGER IF EXISTS trg_organization_holidays_notify_truncate ON organization_holidays;
+CREATE TRIGGER trg_organization_holidays_notify_truncate
+AFTER TRUNCATE ON organization_holidays
+FOR EACH STATEMENT EXECUTE FUNCTION notify_holidays_changed();
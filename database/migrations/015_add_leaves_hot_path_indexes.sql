@@ -0,0 +1,16 @@
+-- Indexes for the hot leaves queries in services.leaves_service.
+-- (emp_code, status, from_date) is already covered by idx_leaves_emp_code
+-- from the bootstrap schema.
+--
+-- Plain CREATE INDEX is used because the migration runner executes each
+-- file inside a transaction, where CONCURRENTLY is not allowed.
+
+-- get_team_leaves: WHERE manager_code = ? ORDER BY applied_at DESC LIMIT ?
+CREATE INDEX IF NOT EXISTS idx_leaves_manager_applied
+    ON leaves(manager_code, applied_at DESC);
+
+-- is_employee_on_leave: approved leave covering CURRENT_DATE.
+-- get_employee_leave_balance: approved leaves for the year.
+CREATE INDEX IF NOT EXISTS idx_leaves_current_approved
+    ON leaves(emp_code, from_date, to_date)
+    WHERE status = 'approved';
@@ -0,0 +1,4 @@
+-- verify_otp selects otp_codes.attempts explicitly instead of SELECT *.
+-- The bootstrap schema has the column, but older deployments created
+-- otp_codes before it was added.
+ALTER TABLE otp_codes ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0;
@@ -0,0 +1,39 @@
+-- Composite/partial indexes for the per-request leaves, activity tracking
+-- and OTP lookups. Existing coverage that is reused rather than duplicated:
+--   idx_leaves_manager (manager_code, status, applied_at) - scanned backwards
+--     for get_team_leaves(status=...) ORDER BY applied_at DESC
+--   idx_activities_email_date (employee_email, date, ...) - tracking summary
+-- approve_leave/cancel_leave look leaves up by primary key, so an INCLUDE
+-- list on a secondary index would not make them index-only.
+--
+-- Plain CREATE INDEX is used because the migration runner executes each
+-- file inside a transaction, where CONCURRENTLY is not allowed.
+
+-- get_my_leaves: WHERE emp_code = ? [AND status = ?] ORDER BY applied_at DESC
+CREATE INDEX IF NOT EXISTS idx_leaves_emp_applied
+    ON leaves(emp_code, applied_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_leaves_emp_status_applied
+    ON leaves(emp_code, status, applied_at DESC);
+
+-- get_active_activities / auto_track_active_activities:
+-- WHERE status = 'active' ORDER BY start_time DESC
+CREATE INDEX IF NOT EXISTS idx_activities_active_start
+    ON activities(start_time DESC)
+    WHERE status = 'active';
+
+-- verify_otp: unused code for an employee, newest first
+CREATE INDEX IF NOT EXISTS idx_otp_codes_active_lookup
+    ON otp_codes(emp_code, otp_code, created_at DESC)
+    WHERE used = false;
+
+-- location_tracking predates the bootstrap schema and only exists on
+-- deployed databases.
+DO $$
+BEGIN
+    IF to_regclass('public.location_tracking') IS NOT NULL THEN
+        -- tracking history, route distance and per-activity counts
+        CREATE INDEX IF NOT EXISTS idx_location_tracking_activity_time
+            ON location_tracking(activity_id, tracked_at);
+    END IF;
+END $$;
@@ -0,0 +1,20 @@
+-- Notify listeners whenever an activity starts, ends or is removed so the
+-- per-process active-activity cache (services.locationtracking_service)
+-- can refresh just that row. Payload is the activity id.
+
+CREATE OR REPLACE FUNCTION notify_activities_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('activities_changed', OLD.id::TEXT);
+    ELSIF TG_OP = 'INSERT' OR OLD.status IS DISTINCT FROM NEW.status THEN
+        PERFORM pg_notify('activities_changed', NEW.id::TEXT);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_activities_notify ON activities;
+CREATE TRIGGER trg_activities_notify
+AFTER INSERT OR UPDATE OF status OR DELETE ON activities
+FOR EACH ROW EXECUTE FUNCTION notify_activities_changed();
@@ -0,0 +1,40 @@
+-- Numeric latitude/longitude for tracking points, so readers stop parsing
+-- the "lat, lon" text in location on every row.
+--
+-- The columns are plain and nullable, so adding them is a catalog-only
+-- change that does not rewrite location_tracking. A BEFORE trigger fills
+-- them from location, which keeps every writer (tracking endpoints,
+-- clock-in/out, activity start/end) in sync without code changes. Rows
+-- written before this migration are backfilled in batches, outside this
+-- transaction, by locationtracking_service.backfill_tracking_coordinates().
+--
+-- Only "lat, lon" (comma followed by a space) parses, matching
+-- _parse_point() in the Python distance fallback; anything else gets NULLs.
+
+CREATE OR REPLACE FUNCTION location_tracking_set_coordinates() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.location ~ '^\s*[-+]?[0-9]*\.?[0-9]+\s*, \s*[-+]?[0-9]*\.?[0-9]+\s*$' THEN
+        NEW.latitude := split_part(NEW.location, ',', 1)::double precision;
+        NEW.longitude := split_part(NEW.location, ',', 2)::double precision;
+    ELSE
+        NEW.latitude := NULL;
+        NEW.longitude := NULL;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF to_regclass('public.location_tracking') IS NOT NULL THEN
+        ALTER TABLE location_tracking
+            ADD COLUMN IF NOT EXISTS latitude double precision,
+            ADD COLUMN IF NOT EXISTS longitude double precision;
+
+        DROP TRIGGER IF EXISTS trg_location_tracking_coordinates ON location_tracking;
+        CREATE TRIGGER trg_location_tracking_coordinates
+        BEFORE INSERT OR UPDATE OF location ON location_tracking
+        FOR EACH ROW EXECUTE FUNCTION location_tracking_set_coordinates();
+    END IF;
+END $$;
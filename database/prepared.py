@@ -0,0 +1,54 @@
+"""
+Server-side prepared statements for hot per-request queries.
+
+Each statement is PREPAREd once per database session and then run with
+EXECUTE, so Postgres skips parsing and planning on repeat calls. Prepared
+names are tracked per connection object; pooled connections keep their
+session between checkouts, and a recycled connection starts with an empty
+set.
+"""
+
+import re
+import weakref
+from typing import Sequence
+
+import psycopg2.errors
+
+_PLACEHOLDER = re.compile(r"%s")
+
+# connection -> set of statement names prepared on that session
+_prepared_by_connection = weakref.WeakKeyDictionary()
+
+
+class PreparedStatement:
+    """A named statement with explicit parameter types, written with %s placeholders."""
+
+    def __init__(self, name: str, param_types: Sequence[str], sql: str):
+        if sql.count("%s") != len(param_types):
+            raise ValueError(f"{name}: expected {len(param_types)} placeholders")
+
+        self.name = name
+        counter = iter(range(1, len(param_types) + 1))
+        body = _PLACEHOLDER.sub(lambda _: f"${next(counter)}", sql.strip())
+        self.prepare_sql = f"PREPARE {name} ({', '.join(param_types)}) AS {body}"
+        self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(param_types))})"
+
+
+def execute_prepared(cursor, statement: PreparedStatement, params: Sequence):
+    """Run statement on cursor, preparing it first if this session has not yet."""
+    conn = cursor.connection
+    prepared = _prepared_by_connection.get(conn)
+    if prepared is None:
+        prepared = _prepared_by_connection[conn] = set()
+
+    if statement.name not in prepared:
+        cursor.execute(statement.prepare_sql)
+        prepared.add(statement.name)
+
+    try:
+        cursor.execute(statement.execute_sql, tuple(params))
+    except psycopg2.errors.InvalidSqlStatementName:
+        # The session lost its prepared statements (e.g. DISCARD ALL by a
+        # proxy); re-prepare on the next call.
+        prepared.clear()
+        raise
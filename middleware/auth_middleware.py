@@ -6,7 +6,7 @@ JWT token validation
 from flask import request, jsonify
 from functools import wraps
 from services.auth_service import decode_jwt_token
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from config import Config
 import jwt
 import logging
@@ -41,7 +41,7 @@ def _load_user(query, params):
         return dict(user) if user else None
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _query_user_by_emp_code(emp_code):
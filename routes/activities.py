@@ -13,7 +13,7 @@ from services.activity_service import (
     start_break, end_break
 )
 from services.lead_service import create_lead, parse_lead_identifier
-from services.locationtracking_service import track_location
+from services.locationtracking_service import track_location, track_locations_bulk
 
 activities_bp = Blueprint('activities', __name__)
 
@@ -36,7 +36,7 @@ def _resolve_emp_email(emp_code: str):
         row = cursor.fetchone()
         if not row:
             return None
-        return row.get('emp_email') if hasattr(row, 'keys') else row[0]
+        return row.get('emp_email')
     finally:
         cursor.close()
         return_connection(conn)
@@ -414,3 +414,45 @@ def track(current_user):
     )
     
     return jsonify(result[0]), result[1]
+
+
+@activities_bp.route('/track/bulk', methods=['POST'])
+@token_required
+def track_bulk(current_user):
+    """
+    📍 Track a batch of GPS points for an active activity in one request
+    
+    For mobile clients that buffer pings (e.g. while offline) and sync them
+    together; all points are inserted in a single statement.
+    
+    Request Body:
+        {
+            "activity_id": 123,           // required - ID of active activity
+            "points": [                   // required - up to 500 points
+                {
+                    "latitude": "17.385044",
+                    "longitude": "78.486671",
+                    "tracked_at": "2025-01-15T10:30:00"   // optional, defaults to now
+                }
+            ]
+        }
+    """
+    data = request.get_json()
+    
+    activity_id = data.get('activity_id')
+    points = data.get('points')
+    
+    if not activity_id or not points:
+        return jsonify({
+            "success": False,
+            "message": "activity_id and points are required"
+        }), 400
+    
+    result = track_locations_bulk(
+        activity_id,
+        current_user['emp_email'],
+        points,
+        tracking_type='auto'
+    )
+    
+    return jsonify(result[0]), result[1]
@@ -36,7 +36,7 @@ def _resolve_emp_email(emp_code: str):
         row = cursor.fetchone()
         if not row:
             return None
-        return row.get('emp_email') if hasattr(row, 'keys') else row[0]
+        return row.get('emp_email')
     finally:
         cursor.close()
         return_connection(conn)
@@ -15,7 +15,7 @@ from services.auth_service import (
     get_user_active_sessions,
     cleanup_expired_tokens
 )
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from middleware.auth_middleware import token_required
 from datetime import datetime, date, time
 from typing import Dict
@@ -133,16 +133,14 @@ def request_otp():
         otp = otp_service.generate_otp()
         otp_service.save_otp(emp_code, otp)
         
-        # Send OTP
-        sent = whatsapp_service.send_otp(
+        # Send OTP in the background; the code is already saved, and delivery
+        # failures are logged by the sender
+        whatsapp_service.send_otp_async(
             employee['emp_contact'],
             otp,
             employee['emp_full_name']
         )
         
-        if not sent:
-            return jsonify({"success": False, "message": "Failed to send OTP"}), 500
-        
         return jsonify({
             "success": True,
             "message": f"OTP sent to {employee['emp_contact'][-4:]}",
@@ -150,7 +148,7 @@ def request_otp():
         }), 200
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 @auth_bp.route('/verify-otp', methods=['POST'])
@@ -261,7 +259,7 @@ def verify_otp():
         }), 200
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 @auth_bp.route('/refresh', methods=['POST'])
@@ -456,7 +454,7 @@ def revoke_session(current_user, session_id):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 @auth_bp.route('/me', methods=['GET'])
@@ -495,7 +493,7 @@ def get_profile(current_user):
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 @auth_bp.route('/verse-session', methods=['GET'])
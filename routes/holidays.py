@@ -5,7 +5,7 @@ Handles fetching holiday data for calendar display
 
 from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import token_required
-from services.leaves_service import get_organization_holidays
+from services.leaves_service import get_organization_holidays_view
 from datetime import datetime
 import logging
 
@@ -53,7 +53,7 @@ def get_holidays(current_user):
             }), 400
         
         # Fetch holidays from service
-        holidays = get_organization_holidays(year)
+        holidays = get_organization_holidays_view(year)
         
         return jsonify({
             "year": year,
@@ -79,7 +79,7 @@ def get_available_years(current_user):
     Returns:
         JSON response with list of years
     """
-    from database.connection import get_db_connection
+    from database.connection import get_db_connection, return_connection
     
     try:
         conn = get_db_connection()
@@ -92,10 +92,10 @@ def get_available_years(current_user):
         """)
         
         rows = cursor.fetchall()
-        years = [int(row['year']) if hasattr(row, 'keys') else int(row[0]) for row in rows]
+        years = [int(row['year']) for row in rows]
         
         cursor.close()
-        conn.close()
+        return_connection(conn)
         
         return jsonify({
             "success": True,
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 import logging
 from middleware.auth_middleware import token_required
 from database.connection import get_db_connection, return_connection
-from services.whatsapp_service import send_leave_notification
+from services.whatsapp_service import send_leave_notification, send_leave_notifications_bulk
 from services.notification_service import (
     send_push_notification_to_department,
     send_push_notification_to_employee,
@@ -83,20 +83,12 @@ def get_employee_by_code(emp_code):
     if not row:
         return None
 
-    if hasattr(row, 'keys'):
-        return {
-            "emp_code": row['emp_code'],
-            "name": row['emp_full_name'],
-            "phone": row['emp_contact'],
-            "manager_code": row['emp_manager']
-        }
-    else:
-        return {
-            "emp_code": row[0],
-            "name": row[1],
-            "phone": row[2],
-            "manager_code": row[3]
-        }
+    return {
+        "emp_code": row['emp_code'],
+        "name": row['emp_full_name'],
+        "phone": row['emp_contact'],
+        "manager_code": row['emp_manager']
+    }
 
 
 def get_manager(emp_code):
@@ -130,27 +122,15 @@ def get_leave_details(leave_id):
     if not row:
         return None
 
-    if hasattr(row, 'keys'):
-        return {
-            "emp_code": row['emp_code'],
-            "from_date": row['from_date'].strftime('%d-%m-%Y') if row['from_date'] else None,
-            "to_date": row['to_date'].strftime('%d-%m-%Y') if row['to_date'] else None,
-            "leave_type": row['leave_type'],
-            "status": row['status'],
-            "leave_count": float(row['leave_count']) if row.get('leave_count') is not None else None,
-            "notes": row.get('notes', '')
-        }
-    else:
-        from datetime import date
-        return {
-            "emp_code": row[0],
-            "from_date": row[1].strftime('%d-%m-%Y') if isinstance(row[1], date) else row[1],
-            "to_date": row[2].strftime('%d-%m-%Y') if isinstance(row[2], date) else row[2],
-            "leave_type": row[3],
-            "status": row[4],
-            "leave_count": float(row[5]) if row[5] is not None else None,
-            "notes": row[6] if len(row) > 6 and row[6] else ''
-        }
+    return {
+        "emp_code": row['emp_code'],
+        "from_date": row['from_date'].strftime('%d-%m-%Y') if row['from_date'] else None,
+        "to_date": row['to_date'].strftime('%d-%m-%Y') if row['to_date'] else None,
+        "leave_type": row['leave_type'],
+        "status": row['status'],
+        "leave_count": float(row['leave_count']) if row.get('leave_count') is not None else None,
+        "notes": row.get('notes', '')
+    }
 
 
 # =========================================================
@@ -272,29 +252,47 @@ def approve(current_user):
         action_map = {"approve": "approved", "reject": "rejected", "cancel": "cancelled"}
         action_label = action_map.get(raw_action, raw_action)
 
+        # WhatsApp messages to the employee and the manager go out together
+        whatsapp_notifications = []
+
         # --- Notify Employee: "Your leave has been approved/rejected" ---
         if employee and employee.get("phone"):
-            try:
-                emp_notif = send_leave_notification(
-                    phone_number=employee["phone"],
-                    title="Leave Status Update",
-                    employee_name=employee["name"],       # recipient (employee)
-                    message=action_label,                 # "approved" / "rejected"
-                    from_date=leave["from_date"],
-                    to_date=leave["to_date"],
-                    notification_type="decision",
-                    number_of_days=leave.get("leave_count")
-                )
-                logger.info(
-                    "Employee leave-status WhatsApp notification sent=%s employee=%s",
-                    emp_notif,
-                    employee["emp_code"]
-                )
-            except Exception as e:
-                logger.exception("Error sending employee leave-status notification: %s", e)
+            whatsapp_notifications.append(("Employee leave-status", employee["emp_code"], dict(
+                phone_number=employee["phone"],
+                title="Leave Status Update",
+                employee_name=employee["name"],       # recipient (employee)
+                message=action_label,                 # "approved" / "rejected"
+                from_date=leave["from_date"],
+                to_date=leave["to_date"],
+                notification_type="decision",
+                number_of_days=leave.get("leave_count")
+            )))
         else:
             logger.warning("Employee details missing or no phone. employee=%s", employee)
 
+        # --- Notify Manager: "You have approved/rejected {Employee}'s leave" ---
+        if manager and manager.get("phone") and employee:
+            whatsapp_notifications.append(("Manager leave-action", manager["emp_code"], dict(
+                phone_number=manager["phone"],
+                title="Leave Action Taken",
+                employee_name=manager["name"],           # recipient (manager)
+                message=action_label,                    # "approved" / "rejected"
+                from_date=leave["from_date"],
+                to_date=leave["to_date"],
+                notification_type="manager_action",
+                number_of_days=leave.get("leave_count"),
+                subject_employee_name=employee["name"]   # employee whose leave was actioned
+            )))
+        else:
+            logger.warning("Manager details missing or no phone. manager=%s", manager)
+
+        try:
+            sent = send_leave_notifications_bulk([kwargs for _, _, kwargs in whatsapp_notifications])
+            for (label, recipient, _), notif in zip(whatsapp_notifications, sent):
+                logger.info("%s WhatsApp notification sent=%s recipient=%s", label, notif, recipient)
+        except Exception as e:
+            logger.exception("Error sending leave WhatsApp notifications: %s", e)
+
         if employee:
             try:
                 push_title = "Leave Approved" if leave_status == "approved" else "Leave Rejected"
@@ -322,30 +320,6 @@ def approve(current_user):
             except Exception as e:
                 logger.exception("Error sending employee leave-status push notification: %s", e)
 
-        # --- Notify Manager: "You have approved/rejected {Employee}'s leave" ---
-        if manager and manager.get("phone") and employee:
-            try:
-                mgr_notif = send_leave_notification(
-                    phone_number=manager["phone"],
-                    title="Leave Action Taken",
-                    employee_name=manager["name"],           # recipient (manager)
-                    message=action_label,                    # "approved" / "rejected"
-                    from_date=leave["from_date"],
-                    to_date=leave["to_date"],
-                    notification_type="manager_action",
-                    number_of_days=leave.get("leave_count"),
-                    subject_employee_name=employee["name"]   # employee whose leave was actioned
-                )
-                logger.info(
-                    "Manager leave-action WhatsApp notification sent=%s manager=%s",
-                    mgr_notif,
-                    manager["emp_code"]
-                )
-            except Exception as e:
-                logger.exception("Error sending manager leave-action notification: %s", e)
-        else:
-            logger.warning("Manager details missing or no phone. manager=%s", manager)
-
     return jsonify(result), status
 
 
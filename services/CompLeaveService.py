@@ -8,7 +8,7 @@ Key differences from standard version:
 
 import calendar
 from datetime import datetime, timedelta, date, time
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from typing import Tuple, Dict, List, Optional
 import logging
 from config import Config
@@ -204,7 +204,7 @@ def process_compoff_expirations() -> Tuple[Dict, int]:
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -360,7 +360,7 @@ def is_working_day(check_date: date, emp_code: str) -> Tuple[bool, str]:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -488,7 +488,7 @@ def count_clock_ins_on_date(emp_email: str, work_date: date) -> int:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -614,7 +614,7 @@ def calculate_and_record_compoff(
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -857,7 +857,7 @@ def scan_attendance_and_create_overtime_records(
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -908,7 +908,7 @@ def get_employee_overtime_records(emp_code: str, status: Optional[str] = None, l
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -962,7 +962,7 @@ def get_my_compoff_requests(emp_code: str, status: Optional[str] = None, limit:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -996,7 +996,7 @@ def get_employee_details(emp_code: str) -> Optional[Dict]:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1159,7 +1159,7 @@ def request_compoff(
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1284,7 +1284,7 @@ def approve_compoff_request(
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1343,7 +1343,7 @@ def cancel_compoff_request(request_id: int, emp_code: str) -> Tuple[Dict, int]:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1404,7 +1404,7 @@ def get_compoff_balance(emp_code: str) -> Tuple[Dict, int]:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1477,7 +1477,7 @@ def get_team_compoff_requests(manager_emp_code: str, status: Optional[str] = Non
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1644,7 +1644,7 @@ def get_employee_overtime_records(emp_code: str, status: Optional[str] = None, l
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_my_compoff_requests(emp_code: str, status: Optional[str] = None, limit: int = 50) -> Tuple[Dict, int]:
@@ -1683,7 +1683,7 @@ def get_my_compoff_requests(emp_code: str, status: Optional[str] = None, limit:
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_my_avail_compoff_requests(emp_code: str, status: Optional[str] = None, limit: int = 50) -> Tuple[Dict, int]:
@@ -1736,7 +1736,7 @@ def get_my_avail_compoff_requests(emp_code: str, status: Optional[str] = None, l
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def request_compoff(
@@ -1872,7 +1872,7 @@ def request_compoff(
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def approve_compoff_request(
@@ -2000,7 +2000,7 @@ def approve_compoff_request(
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def cancel_compoff_request(request_id: int, emp_code: str) -> Tuple[Dict, int]:
@@ -2045,7 +2045,7 @@ def cancel_compoff_request(request_id: int, emp_code: str) -> Tuple[Dict, int]:
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def request_avail_compoff(
@@ -2160,7 +2160,7 @@ def request_avail_compoff(
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def approve_avail_compoff_request(
@@ -2274,7 +2274,7 @@ def approve_avail_compoff_request(
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_compoff_balance(emp_code: str) -> Tuple[Dict, int]:
@@ -2336,7 +2336,7 @@ def get_compoff_balance(emp_code: str) -> Tuple[Dict, int]:
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_team_compoff_requests(manager_emp_code: str, status: Optional[str] = None, limit: int = 50) -> Tuple[Dict, int]:
@@ -2390,7 +2390,7 @@ def get_team_compoff_requests(manager_emp_code: str, status: Optional[str] = Non
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_team_compoff_avail_requests(manager_emp_code: str, status: Optional[str] = None, limit: int = 50) -> Tuple[Dict, int]:
@@ -2443,7 +2443,7 @@ def get_team_compoff_avail_requests(manager_emp_code: str, status: Optional[str]
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_compoff_statistics(emp_code: str, year: Optional[int] = None, month: Optional[int] = None) -> Tuple[Dict, int]:
@@ -2504,7 +2504,7 @@ def get_compoff_statistics(emp_code: str, year: Optional[int] = None, month: Opt
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
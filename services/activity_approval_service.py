@@ -4,7 +4,7 @@ Manager approval system for late arrival and early leave requests
 """
 
 from datetime import datetime
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from services.leaves_service import is_employee_on_leave
 from typing import Dict, Tuple, Optional
 import logging
@@ -22,12 +22,10 @@ def _get_employee_privilege_flags(emp_code: str) -> Tuple[Optional[str], Optiona
         row = cursor.fetchone()
         if not row:
             return None, None
-        if hasattr(row, 'keys'):
-            return row.get('emp_designation'), row.get('emp_department')
-        return row[0], row[1] if len(row) > 1 else None
+        return row.get('emp_designation'), row.get('emp_department')
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _is_privileged_emp(emp_code: str) -> bool:
@@ -168,7 +166,7 @@ def request_late_arrival_approval(emp_code: str, activity_id: int,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def request_early_leave_approval(emp_code: str, activity_id: int, 
@@ -302,7 +300,7 @@ def request_early_leave_approval(emp_code: str, activity_id: int,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def approve_activity_request(approval_id: int, manager_code: str, 
@@ -395,7 +393,7 @@ def approve_activity_request(approval_id: int, manager_code: str,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_my_approval_requests(emp_code: str, status: str = None) -> Tuple[Dict, int]:
@@ -434,7 +432,7 @@ def get_my_approval_requests(emp_code: str, status: str = None) -> Tuple[Dict, i
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_team_approval_requests(manager_code: str, status: str = None) -> Tuple[Dict, int]:
@@ -481,4 +479,4 @@ def get_team_approval_requests(manager_code: str, status: str = None) -> Tuple[D
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
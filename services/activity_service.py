@@ -1,5 +1,5 @@
 from datetime import datetime
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from services.attendance_constants import ATTENDANCE_STATUS_LOGGED_IN
 from services.geocoding_service import get_address_from_coordinates
 from config import ActivityType
@@ -417,7 +417,7 @@ def start_activity(emp_email: str, emp_name: str, activity_type: str,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def end_activity(activity_id: int, lat: str, lon: str):
@@ -612,7 +612,7 @@ def end_activity(activity_id: int, lat: str, lon: str):
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_activities(emp_email: str, limit: int = 50, activity_type: str = None,
@@ -741,7 +741,7 @@ def get_activities(emp_email: str, limit: int = 50, activity_type: str = None,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_team_activities(manager_code: str, limit: int = 100, activity_type: str = None,
@@ -901,7 +901,7 @@ def get_team_activities(manager_code: str, limit: int = 100, activity_type: str
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def mark_destination_visited(
@@ -1010,7 +1010,7 @@ def mark_destination_visited(
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_activity_route(activity_id: int):
@@ -1140,7 +1140,7 @@ def get_activity_route(activity_id: int):
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def start_break(emp_email: str, emp_name: str, break_type: str):
@@ -1280,7 +1280,7 @@ def get_active_activity(emp_email: str):
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_activity_statistics(emp_email: str, start_date: str = None, end_date: str = None):
@@ -1366,4 +1366,4 @@ def get_activity_statistics(emp_email: str, start_date: str = None, end_date: st
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
@@ -3,7 +3,7 @@ Admin Service
 Business logic for admin-only operations
 """
 
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from datetime import date, datetime, time, timedelta
 import calendar
 from collections import OrderedDict
@@ -37,7 +37,7 @@ def get_admin_stats():
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
         
 def get_all_employees():
     conn = get_db_connection()
@@ -76,7 +76,7 @@ def get_all_employees():
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def create_admin_user(emp_code: str, can_read: bool = True, can_write: bool = False):
@@ -147,7 +147,7 @@ def create_admin_user(emp_code: str, can_read: bool = True, can_write: bool = Fa
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_admin_permissions(emp_code: str):
@@ -189,7 +189,7 @@ def get_admin_permissions(emp_code: str):
         }, 200)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def update_admin_permissions(emp_code: str, can_read=None, can_write=None):
@@ -247,7 +247,7 @@ def update_admin_permissions(emp_code: str, can_read=None, can_write=None):
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
         
 def get_all_attendance_records():
     conn = get_db_connection()
@@ -272,7 +272,7 @@ def get_all_attendance_records():
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _format_time_as_12h(timestamp_value):
@@ -380,7 +380,7 @@ def get_attendance_report_base_data(month: int = None, year: int = None, target_
         return cursor.fetchall()
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def build_daily_attendance_report_rows(records):
@@ -521,7 +521,7 @@ def get_attendance_report_data(month: int, year: int):
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 def get_attendance_report_summary(month: int, year: int):
     """Return attendance summary per employee for a month/year."""
@@ -600,7 +600,7 @@ def get_attendance_report_summary(month: int, year: int):
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 def get_all_attendance_status():
     """Get current attendance status for all employees"""
@@ -681,7 +681,7 @@ def get_all_attendance_status():
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 def get_all_attendance_history(limit: int = None, target_date: date = None,
                                page: int = None, page_size: int = None):
@@ -914,7 +914,7 @@ def get_all_attendance_history(limit: int = None, target_date: date = None,
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 def get_all_day_summary(target_date: date = None):
     """Get complete day summary for all employees"""
@@ -995,7 +995,7 @@ def get_all_day_summary(target_date: date = None):
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _get_saturday_occurrence(target_date: date):
@@ -1286,7 +1286,7 @@ def get_admin_holidays(year: int, month: int = None):
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def create_admin_holiday(payload, created_by_emp_code: str = None):
@@ -1456,7 +1456,7 @@ def create_admin_holiday(payload, created_by_emp_code: str = None):
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_calendar_summary(month: int, year: int, department: str = None, emp_code: str = None):
@@ -1771,7 +1771,7 @@ def get_calendar_summary(month: int, year: int, department: str = None, emp_code
         }, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_all_activities(limit: int = 100, activity_type: str = None,
@@ -1926,7 +1926,7 @@ def get_all_activities(limit: int = 100, activity_type: str = None,
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_all_leaves(limit: int = 100, status: str = None, emp_code: str = None,
@@ -2003,7 +2003,7 @@ def get_all_leaves(limit: int = 100, status: str = None, emp_code: str = None,
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_all_overtime_records(limit: int = 100, status: str = None,
@@ -2062,4 +2062,4 @@ def get_all_overtime_records(limit: int = 100, status: str = None,
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
@@ -70,7 +70,7 @@ def _resolve_emp_email(cursor, user_id: int) -> str | None:
     row = cursor.fetchone()
     if not row:
         return None
-    return row.get("emp_email") if hasattr(row, "keys") else row[0]
+    return row.get("emp_email")
 
 
 def _has_active_activity(cursor, emp_email: str) -> bool:
@@ -5,7 +5,7 @@ Business logic for late arrival and early leave handling
 
 from datetime import datetime, date, time
 from config import Config
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from services.attendance_constants import (
     ATTENDANCE_STATUS_PENDING_CLOCK_IN,
     ATTENDANCE_STATUS_LOGGED_IN,
@@ -210,7 +210,7 @@ def get_employee_shift_times(emp_code: str) -> Tuple[Optional[time], Optional[ti
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_employee_and_manager_info(emp_code: str) -> Dict:
@@ -267,7 +267,7 @@ def get_employee_and_manager_info(emp_code: str) -> Dict:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _get_employee_privilege_flags(emp_code: str) -> Tuple[Optional[str], Optional[str]]:
@@ -281,12 +281,10 @@ def _get_employee_privilege_flags(emp_code: str) -> Tuple[Optional[str], Optiona
         row = cursor.fetchone()
         if not row:
             return None, None
-        if hasattr(row, 'keys'):
-            return row.get('emp_designation'), row.get('emp_department')
-        return row[0], row[1] if len(row) > 1 else None
+        return row.get('emp_designation'), row.get('emp_department')
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _is_privileged_emp(emp_code: str) -> bool:
@@ -322,11 +320,11 @@ def is_flexible_grade_employee(emp_code: str) -> bool:
         row = cursor.fetchone()
         if not row:
             return False
-        emp_grade = row.get('emp_grade') if hasattr(row, 'keys') else row[0]
+        emp_grade = row.get('emp_grade')
         return _normalize_emp_grade(emp_grade) == 'FLEXIBLE'
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _get_table_columns(cursor, table_name: str) -> set:
@@ -742,7 +740,7 @@ def build_exception_notification_payload(
         }
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def sync_late_arrival_exception_after_clock_in(
@@ -830,7 +828,7 @@ def sync_late_arrival_exception_after_clock_in(
         return None
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def sync_early_leave_exception_after_clock_out(attendance_id: int, logout_time: datetime) -> Optional[Dict]:
@@ -900,7 +898,7 @@ def sync_early_leave_exception_after_clock_out(attendance_id: int, logout_time:
         return None
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def attach_pending_late_arrival_to_attendance(
@@ -1080,7 +1078,7 @@ def request_late_arrival_exception(emp_code: str, reason: str,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1246,7 +1244,7 @@ def request_early_leave_exception(emp_code: str, attendance_id: int,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1334,7 +1332,7 @@ def cancel_early_leave_exception(emp_code: str, exception_id: int) -> Tuple[Dict
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def cancel_late_arrival_exception(emp_code: str, exception_id: int) -> Tuple[Dict, int]:
@@ -1418,7 +1416,7 @@ def cancel_late_arrival_exception(emp_code: str, exception_id: int) -> Tuple[Dic
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1506,7 +1504,7 @@ def approve_exception(exception_id: int, manager_code: str,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -1615,7 +1613,7 @@ def get_my_exceptions(emp_code: str, status: str = None,
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_team_exceptions(
@@ -1699,7 +1697,7 @@ def get_team_exceptions(
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def _build_admin_exception_actions(status: Optional[str]) -> List[str]:
@@ -1839,7 +1837,7 @@ def get_admin_attendance_exceptions(
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_my_late_arrival_records(emp_code: str, status: str = None) -> Tuple[Dict, int]:
@@ -1944,7 +1942,7 @@ def get_my_late_arrival_records(emp_code: str, status: str = None) -> Tuple[Dict
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_my_early_leave_records(emp_code: str, status: str = None) -> Tuple[Dict, int]:
@@ -2050,7 +2048,7 @@ def get_my_early_leave_records(emp_code: str, status: str = None) -> Tuple[Dict,
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -2128,4 +2126,4 @@ def check_early_leave_approval(attendance_id: int, current_time: Optional[time]
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
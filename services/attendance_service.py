@@ -12,7 +12,7 @@ NEW FEATURES:
 
 from datetime import datetime, timedelta, date, time
 import json
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from services.attendance_constants import (
     ATTENDANCE_STATUS_LOGGED_IN,
     ATTENDANCE_STATUS_LOGGED_OUT,
@@ -471,7 +471,7 @@ def clock_in(emp_email: str, emp_name: str, phone: str, lat: str, lon: str, atte
 
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def clock_out(emp_email: str, lat: str, lon: str):
@@ -806,7 +806,7 @@ def clock_out(emp_email: str, lat: str, lon: str):
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # Other functions remain the same (get_attendance_status, get_attendance_history, get_day_summary)
@@ -913,7 +913,7 @@ def get_attendance_status(emp_email: str):
         }, 200)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_attendance_history(emp_email: str, limit: int = 30):
@@ -1090,7 +1090,7 @@ def get_attendance_history(emp_email: str, limit: int = 30):
         }, 200)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_day_summary(emp_email: str, target_date: date = None):
@@ -1176,7 +1176,7 @@ def get_day_summary(emp_email: str, target_date: date = None):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 def get_attendance_by_id(attendance_id: int):
     """
@@ -1214,7 +1214,7 @@ def get_attendance_by_id(attendance_id: int):
         return {"success": False, "message": "Internal server error"}, 500
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def update_attendance(
@@ -1379,4 +1379,4 @@ def update_attendance(
     finally:
         conn.autocommit = True
         cursor.close()
-        conn.close()
+        return_connection(conn)
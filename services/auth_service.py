@@ -12,7 +12,7 @@ import uuid
 import json
 from datetime import datetime, timedelta
 from config import Config
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 import logging
 
 logger = logging.getLogger(__name__)
@@ -106,7 +106,7 @@ def create_refresh_token(emp_code: str, email: str, user_agent: str = None,
         raise
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def verify_refresh_token(token: str) -> dict:
@@ -187,7 +187,7 @@ def verify_refresh_token(token: str) -> dict:
         raise
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def rotate_refresh_token(old_token: str, user_agent: str = None, 
@@ -274,7 +274,7 @@ def rotate_refresh_token(old_token: str, user_agent: str = None,
         raise
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def revoke_refresh_token(token: str, reason: str = "User logout") -> bool:
@@ -306,7 +306,7 @@ def revoke_refresh_token(token: str, reason: str = "User logout") -> bool:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def revoke_token_family(token_family: str) -> int:
@@ -337,7 +337,7 @@ def revoke_token_family(token_family: str) -> int:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def revoke_all_user_tokens(emp_code: str, reason: str = "User logout") -> int:
@@ -366,7 +366,7 @@ def revoke_all_user_tokens(emp_code: str, reason: str = "User logout") -> int:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_user_active_sessions(emp_code: str) -> list:
@@ -412,7 +412,7 @@ def get_user_active_sessions(emp_code: str) -> list:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def cleanup_expired_tokens() -> int:
@@ -439,7 +439,7 @@ def cleanup_expired_tokens() -> int:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # ==========================================
@@ -479,7 +479,7 @@ def get_or_create_user(emp_code: str) -> dict:
         return dict(user)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def update_last_login(emp_code: str):
@@ -496,4 +496,4 @@ def update_last_login(emp_code: str):
         conn.commit()
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
@@ -4,7 +4,7 @@ Comprehensive location tracking report for all activities
 """
 
 from datetime import datetime, date
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from typing import Dict, List, Tuple
 import logging
 
@@ -298,7 +298,7 @@ def get_daily_location_report(emp_email: str, report_date: date = None) -> Tuple
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_weekly_location_summary(emp_email: str, week_start: date = None) -> Tuple[Dict, int]:
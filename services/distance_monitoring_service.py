@@ -7,7 +7,7 @@ Monitor user location relative to clock-in location ONLY:
 """
 
 from datetime import datetime, date
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from math import radians, sin, cos, sqrt, atan2
 from typing import Dict, Tuple, Optional
 from services.attendance_constants import ATTENDANCE_STATUS_LOGGED_IN
@@ -87,7 +87,7 @@ def is_working_day(check_date: date) -> Tuple[bool, str]:
         return (True, "Assumed working day")  # Default to working day if check fails
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def is_user_moving(speed_kmh: Optional[float], last_lat: Optional[str], last_lon: Optional[str], 
@@ -384,7 +384,7 @@ def check_distance_from_clock_in(emp_email: str, current_lat: str, current_lon:
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def clear_distance_alert(attendance_id: int) -> Tuple[Dict, int]:
@@ -453,7 +453,7 @@ def clear_distance_alert(attendance_id: int) -> Tuple[Dict, int]:
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_distance_alerts(emp_email: str) -> Tuple[Dict, int]:
@@ -507,4 +507,4 @@ def get_distance_alerts(emp_email: str) -> Tuple[Dict, int]:
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
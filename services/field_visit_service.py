@@ -4,7 +4,7 @@ GPS tracking service for field visits (Rapido-style 3-minute intervals)
 """
 
 from datetime import datetime, date
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
 from services.geocoding_service import get_address_from_coordinates
 import logging
 from math import radians, sin, cos, sqrt, atan2
@@ -99,7 +99,7 @@ def track_location(field_visit_id: int, lat: str, lon: str,
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def update_total_distance(cursor, field_visit_id: int):
@@ -211,7 +211,7 @@ def get_active_field_visits():
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_tracking_history(field_visit_id: int):
@@ -261,7 +261,7 @@ def get_tracking_history(field_visit_id: int):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_field_visit_summary(emp_email: str, date: date = None):
@@ -315,7 +315,7 @@ def get_field_visit_summary(emp_email: str, date: date = None):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_route_map_data(field_visit_id: int):
@@ -401,7 +401,7 @@ def get_route_map_data(field_visit_id: int):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def calculate_visit_statistics(field_visit_id: int):
@@ -472,4 +472,4 @@ def calculate_visit_statistics(field_visit_id: int):
         
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        return_connection(conn)
\ No newline at end of file
@@ -7,10 +7,28 @@ NO MAPBOX - This is backend only, uses free Nominatim service
 import requests
 from config import Config
 import logging
+import threading
+import time
+from collections import OrderedDict
 from functools import lru_cache
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Tracking points are cached on a 4-decimal grid (~11m), so a stationary or
+# slow-moving employee resolves to the same cell between pings.
+GRID_DECIMALS = 4
+GRID_CACHE_SIZE = 4096
+
+_GRID_ADDRESSES: "OrderedDict[Tuple[float, float], str]" = OrderedDict()
+_GRID_LOCK = threading.Lock()
+
+# Grid-cell misses (the background tracking geocoder) are spaced at least
+# this far apart, per Nominatim's usage policy of one request per second.
+NOMINATIM_MIN_INTERVAL_SECONDS = 1.0
+_NOMINATIM_LOCK = threading.Lock()
+_nominatim_last_request = 0.0
+
 
 @lru_cache(maxsize=1000)  # Cache 1000 most recent addresses
 def get_address_from_coordinates(latitude: str, longitude: str) -> str:
@@ -33,15 +51,32 @@ def get_address_from_coordinates(latitude: str, longitude: str) -> str:
     """
     if not latitude or not longitude:
         return ''
-    
+
+    address = _reverse_geocode(latitude, longitude)
+    return address if address is not None else _coordinates_text(latitude, longitude)
+
+
+def _coordinates_text(latitude, longitude) -> str:
+    """Fallback "address": the coordinates themselves"""
+    try:
+        return f"{float(latitude):.6f}, {float(longitude):.6f}"
+    except (ValueError, TypeError):
+        return f"{latitude}, {longitude}"
+
+
+def _reverse_geocode(latitude, longitude) -> Optional[str]:
+    """
+    Street-level address from Nominatim, or None when none could be had
+    (invalid coordinates, rate limit, error status, timeout, empty result).
+    """
     try:
         # Validate coordinates
         try:
-            lat_f = float(latitude)
-            lon_f = float(longitude)
+            float(latitude)
+            float(longitude)
         except (ValueError, TypeError):
             logger.error(f"Invalid coordinates: lat={latitude}, lon={longitude}")
-            return f"{latitude}, {longitude}"
+            return None
         
         url = "https://nominatim.openstreetmap.org/reverse"
         params = {
@@ -135,18 +170,87 @@ def get_address_from_coordinates(latitude: str, longitude: str) -> str:
         else:
             logger.warning(f"Nominatim returned status {response.status_code} for {latitude}, {longitude}")
         
-        # Fallback: return formatted coordinates
-        return f"{lat_f:.6f}, {lon_f:.6f}"
+        # No address: the caller falls back to the coordinates
+        return None
     
     except requests.Timeout:
         logger.error(f"Geocoding timeout for {latitude}, {longitude}")
-        return f"{latitude}, {longitude}"
+        return None
     
     except Exception as e:
         logger.error(f"Geocoding error for {latitude}, {longitude}: {str(e)}")
         import traceback
         logger.debug(traceback.format_exc())
-        return f"{latitude}, {longitude}"
+        return None
+
+
+def grid_cell(latitude, longitude) -> Optional[Tuple[float, float]]:
+    """The ~11m grid cell the coordinates fall in, or None if they are invalid"""
+    try:
+        return (round(float(latitude), GRID_DECIMALS), round(float(longitude), GRID_DECIMALS))
+    except (ValueError, TypeError):
+        return None
+
+
+def peek_cached_address(latitude, longitude) -> Optional[str]:
+    """Return the cached address for the coordinates' grid cell, or None (no API call)"""
+    cell = grid_cell(latitude, longitude)
+    if cell is None:
+        return None
+
+    with _GRID_LOCK:
+        address = _GRID_ADDRESSES.get(cell)
+        if address is not None:
+            _GRID_ADDRESSES.move_to_end(cell)
+        return address
+
+
+def _wait_for_nominatim_slot() -> None:
+    global _nominatim_last_request
+    with _NOMINATIM_LOCK:
+        wait = _nominatim_last_request + NOMINATIM_MIN_INTERVAL_SECONDS - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _nominatim_last_request = time.monotonic()
+
+
+def lookup_cached_address(latitude, longitude) -> Optional[str]:
+    """
+    Address for the coordinates' grid cell, geocoding the cell centre on a
+    miss at no more than one Nominatim request per
+    NOMINATIM_MIN_INTERVAL_SECONDS. Returns None, and caches nothing, when
+    no address could be had, so a later call tries again.
+    """
+    cell = grid_cell(latitude, longitude)
+    if cell is None:
+        return None
+
+    address = peek_cached_address(*cell)
+    if address is not None:
+        return address
+
+    fmt = f"{{:.{GRID_DECIMALS}f}}"
+    _wait_for_nominatim_slot()
+    address = _reverse_geocode(fmt.format(cell[0]), fmt.format(cell[1]))
+    if address is None:
+        return None
+
+    with _GRID_LOCK:
+        _GRID_ADDRESSES[cell] = address
+        _GRID_ADDRESSES.move_to_end(cell)
+        while len(_GRID_ADDRESSES) > GRID_CACHE_SIZE:
+            _GRID_ADDRESSES.popitem(last=False)
+
+    return address
+
+
+def get_cached_address(latitude, longitude) -> str:
+    """
+    Address for the coordinates' ~11m grid cell (see lookup_cached_address),
+    falling back to the coordinates themselves when none could be had.
+    """
+    address = lookup_cached_address(latitude, longitude)
+    return address if address is not None else _coordinates_text(latitude, longitude)
 
 
 def clear_geocoding_cache():
@@ -155,6 +259,8 @@ def clear_geocoding_cache():
     Useful if you want to force fresh lookups
     """
     get_address_from_coordinates.cache_clear()
+    with _GRID_LOCK:
+        _GRID_ADDRESSES.clear()
     logger.info("Geocoding cache cleared")
 
 
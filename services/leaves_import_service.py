@@ -10,7 +10,7 @@ import csv
 import logging
 
 from database.connection import get_db_connection, return_connection
-from services.leaves_service import LEAVE_DURATIONS, calculate_leave_count
+from services.leaves_service import LEAVE_DURATIONS, calculate_leave_count, clear_on_leave_cache
 
 logger = logging.getLogger(__name__)
 
@@ -172,7 +172,7 @@ def import_leave_rows(
                 inserted.append(
                     {
                         "row": index,
-                        "leave_id": inserted_row.get("id") if hasattr(inserted_row, "get") else inserted_row[0],
+                        "leave_id": inserted_row.get("id"),
                         "emp_code": normalized["emp_code"],
                     }
                 )
@@ -205,6 +205,7 @@ def import_leave_rows(
 
         if inserted:
             conn.commit()
+            clear_on_leave_cache()
         else:
             conn.rollback()
 
@@ -399,7 +400,7 @@ def _find_duplicate_leave(
     row = cursor.fetchone()
     if not row:
         return None
-    return row.get("id") if hasattr(row, "get") else row[0]
+    return row.get("id")
 
 
 def _first_present(row: Dict[str, Any], keys: Tuple[str, ...], default: Any = None) -> Any:
@@ -3,11 +3,21 @@ Leave Service - FIXED VERSION
 Leave management business logic with cumulative monthly accrual
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
-from database.connection import get_db_connection
+from functools import lru_cache
+from database.connection import (
+    get_db_connection,
+    is_notify_subscribed,
+    return_connection,
+    start_notify_listener,
+)
+from database.prepared import PreparedStatement, execute_prepared
 from config import Config
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, FrozenSet, Optional
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +32,224 @@ LEAVE_TYPES = {
 
 LEAVE_DURATIONS = ['full_day', 'first_half', 'second_half']
 
+# Leave listings up to this many rows are read with a plain fetchall();
+# larger limits go through a server-side cursor, LEAVES_STREAM_ITERSIZE
+# rows per round trip.
+LEAVES_STREAM_THRESHOLD = 1000
+LEAVES_STREAM_ITERSIZE = 200
+
+# Holiday dates per year, stored as date ordinals with the time they were
+# read. Populated lazily and invalidated by NOTIFYs on this channel (see
+# migration 014). The listener is per process and started on first use, so
+# each gunicorn worker subscribes itself; while a process is not subscribed,
+# entries expire after HOLIDAY_CACHE_TTL_SECONDS instead.
+HOLIDAYS_CHANGED_CHANNEL = 'holidays_changed'
+HOLIDAY_CACHE_TTL_SECONDS = 300.0
+_HOLIDAYS: Dict[int, Tuple[FrozenSet[int], float]] = {}
+_HOLIDAYS_LOCK = threading.Lock()
+_holidays_generation = 0
+
+# On-leave lookups are cached per process and keyed on a time bucket of this
+# many seconds, so a leave approved or cancelled in another worker is seen
+# within that window; clear_on_leave_cache() covers the local process.
+ON_LEAVE_CACHE_TTL_SECONDS = 60
+
+# Runs independent lookups concurrently on the apply-leave path.
+_LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='leaves-lookup')
+
+
+# =========================
+# SQL STATEMENTS
+# =========================
+
+_SQL_ON_LEAVE = """
+    SELECT 1 FROM leaves
+    WHERE emp_code = %s
+      AND status = 'approved'
+      AND %s BETWEEN from_date AND to_date
+    LIMIT 1
+"""
+
+_SQL_HOLIDAYS_VIEW = """
+    SELECT
+        id,
+        holiday_date,
+        holiday_name,
+        TO_CHAR(holiday_date, 'FMDay') as weekday,
+        TO_CHAR(holiday_date, 'DD') as day,
+        TO_CHAR(holiday_date, 'Month') as month_name
+    FROM organization_holidays
+    WHERE EXTRACT(YEAR FROM holiday_date) = %s
+    ORDER BY holiday_date
+"""
+
+_SQL_HOLIDAY_DATES = """
+    SELECT holiday_date
+    FROM organization_holidays
+    WHERE EXTRACT(YEAR FROM holiday_date) = %s
+"""
+
+# Late logins and short days over attendance rows aliased "a"; params: late cutoff.
+_SQL_DEDUCTION_COUNT_COLUMNS = """
+        COUNT(*) FILTER (
+            WHERE a.login_time IS NOT NULL
+            AND COALESCE(a.is_compoff_session, FALSE) = FALSE
+            AND date_trunc('minute', a.login_time)::time > %s::time
+        ) AS late_count,
+        COUNT(*) FILTER (
+            WHERE a.working_hours IS NOT NULL
+            AND a.working_hours <= 4
+        ) AS short_days
+"""
+
+# Approved casual/sick usage over leaves rows; params: none.
+_SQL_USED_LEAVE_COLUMNS = """
+        COALESCE(SUM(leave_count) FILTER (WHERE leave_type = 'casual'), 0)::float AS casual_used,
+        COALESCE(SUM(leave_count) FILTER (WHERE leave_type = 'sick'), 0)::float AS sick_used
+"""
+
+_SQL_ATTENDANCE_DEDUCTION_COUNTS = f"""
+    SELECT {_SQL_DEDUCTION_COUNT_COLUMNS}
+    FROM attendance a
+    JOIN employees e ON a.employee_email = e.emp_email
+    WHERE e.emp_code = %s
+    AND a.date BETWEEN %s AND %s
+"""
+
+_SQL_BALANCE_EMP = """
+    SELECT emp_joined_date
+    FROM employees
+    WHERE emp_code = %s
+"""
+
+_SQL_BALANCE_USED = f"""
+    SELECT {_SQL_USED_LEAVE_COLUMNS}
+    FROM leaves
+    WHERE emp_code = %s
+      AND EXTRACT(YEAR FROM from_date) = %s
+      AND status = 'approved'
+"""
+
+# Balance inputs (joining date, approved usage) and month-to-date attendance
+# deductions for get_leave_summary in a single round trip.
+_SQL_BALANCE_AND_DEDUCTIONS = f"""
+    SELECT
+        e.emp_joined_date,
+        used.casual_used,
+        used.sick_used,
+        ded.late_count,
+        ded.short_days
+    FROM employees e
+    CROSS JOIN LATERAL (
+        SELECT {_SQL_USED_LEAVE_COLUMNS}
+        FROM leaves
+        WHERE emp_code = e.emp_code
+          AND EXTRACT(YEAR FROM from_date) = %s
+          AND status = 'approved'
+    ) used
+    CROSS JOIN LATERAL (
+        SELECT {_SQL_DEDUCTION_COUNT_COLUMNS}
+        FROM attendance a
+        WHERE a.employee_email = e.emp_email
+        AND a.date BETWEEN %s AND %s
+    ) ded
+    WHERE e.emp_code = %s
+"""
+
+_SQL_APPLY_EMP = """
+    SELECT e.emp_code, e.emp_full_name, e.emp_email,
+           e.emp_manager, e.emp_informing_manager,
+           m.emp_email AS manager_email, m.emp_full_name AS manager_name,
+           im.emp_email AS informing_email, im.emp_full_name AS informing_name
+    FROM employees e
+    LEFT JOIN employees m ON e.emp_manager = m.emp_code
+    LEFT JOIN employees im ON e.emp_informing_manager = im.emp_code
+    WHERE e.emp_code = %s
+"""
+
+_SQL_APPLY_OVERLAP = """
+    SELECT 1 FROM leaves
+    WHERE emp_code = %s
+    AND status IN ('pending', 'approved')
+    AND (
+        (from_date <= %s AND to_date >= %s) OR
+        (from_date <= %s AND to_date >= %s) OR
+        (from_date >= %s AND to_date <= %s)
+    )
+    LIMIT 1
+"""
+
+_SQL_APPLY_INSERT = """
+    INSERT INTO leaves (
+        emp_code, emp_name, emp_email,
+        manager_code, manager_email,
+        from_date, to_date, leave_type, duration,
+        leave_count, notes, status, applied_at
+    ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,'pending',%s)
+    RETURNING id
+"""
+
+# Per-request leave lookups/updates are prepared once per database session.
+# Reviews and cancellations only touch pending rows, so the status check
+# and the write are one statement; no row back means not found or not
+# pending, and approve_leave reads the status only to tell which.
+_STMT_REVIEW_PENDING_LEAVE = PreparedStatement(
+    'review_pending_leave',
+    ('text', 'text', 'timestamp', 'text', 'int', 'text'),
+    """
+    UPDATE leaves
+    SET status = %s, reviewed_by = %s, reviewed_at = %s, remarks = %s
+    WHERE id = %s AND manager_code = %s AND status = 'pending'
+    RETURNING emp_name
+    """,
+)
+
+_STMT_LEAVE_STATUS_BY_ID_MGR = PreparedStatement('leave_status_by_id_mgr', ('int', 'text'), """
+    SELECT status FROM leaves WHERE id = %s AND manager_code = %s
+""")
+
+_STMT_CANCEL_OWN_PENDING_LEAVE = PreparedStatement('cancel_own_pending_leave', ('timestamp', 'int', 'text'), """
+    UPDATE leaves SET status = 'cancelled', updated_at = %s
+    WHERE id = %s AND emp_code = %s AND status = 'pending'
+    RETURNING id
+""")
+
+# Columns returned by the leave list endpoints (the full leave record), with
+# dates/timestamps formatted DD-MM-YYYY by Postgres. ORDER BY must use the
+# table-qualified column so it sorts the timestamp, not the formatted alias.
+_LEAVE_LIST_COLUMNS = """
+    id, emp_code, emp_name, emp_email, manager_code, manager_email,
+    to_char(from_date, 'DD-MM-YYYY') AS from_date,
+    to_char(to_date, 'DD-MM-YYYY') AS to_date,
+    leave_type, duration, leave_count, notes, status,
+    to_char(applied_at, 'DD-MM-YYYY') AS applied_at,
+    reviewed_by,
+    to_char(reviewed_at, 'DD-MM-YYYY') AS reviewed_at,
+    remarks,
+    to_char(created_at, 'DD-MM-YYYY') AS created_at,
+    to_char(updated_at, 'DD-MM-YYYY') AS updated_at
+"""
+
+_SQL_MY_LEAVES = """
+    SELECT """ + _LEAVE_LIST_COLUMNS + """ FROM leaves WHERE emp_code = %s
+    ORDER BY leaves.applied_at DESC LIMIT %s
+"""
+
+_SQL_MY_LEAVES_BY_STATUS = """
+    SELECT """ + _LEAVE_LIST_COLUMNS + """ FROM leaves WHERE emp_code = %s AND status = %s
+    ORDER BY leaves.applied_at DESC LIMIT %s
+"""
+
+_SQL_TEAM_LEAVES = """
+    SELECT """ + _LEAVE_LIST_COLUMNS + """ FROM leaves WHERE manager_code = %s
+    ORDER BY leaves.applied_at DESC LIMIT %s
+"""
+
+_SQL_TEAM_LEAVES_BY_STATUS = """
+    SELECT """ + _LEAVE_LIST_COLUMNS + """ FROM leaves WHERE manager_code = %s AND status = %s
+    ORDER BY leaves.applied_at DESC LIMIT %s
+"""
+
 
 # =========================
 # HELPER FUNCTIONS
@@ -29,20 +257,28 @@ LEAVE_DURATIONS = ['full_day', 'first_half', 'second_half']
 
 def is_employee_on_leave(emp_code: str) -> bool:
     """Check if employee is currently on approved leave"""
+    return _is_on_leave_on_day(
+        emp_code,
+        date.today().toordinal(),
+        int(time.time() // ON_LEAVE_CACHE_TTL_SECONDS),
+    )
+
+
+@lru_cache(maxsize=2048)
+def _is_on_leave_on_day(emp_code: str, day_ordinal: int, ttl_bucket: int) -> bool:
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            SELECT 1 FROM leaves
-            WHERE emp_code = %s
-              AND status = 'approved'
-              AND CURRENT_DATE BETWEEN from_date AND to_date
-            LIMIT 1
-        """, (emp_code,))
+        cursor.execute(_SQL_ON_LEAVE, (emp_code, date.fromordinal(day_ordinal)))
         return cursor.fetchone() is not None
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
+
+
+def clear_on_leave_cache() -> None:
+    """Forget cached on-leave lookups after leave statuses change"""
+    _is_on_leave_on_day.cache_clear()
 
 
 def calculate_cumulative_leaves(joining_date: date, year: int) -> Dict:
@@ -60,69 +296,105 @@ def calculate_cumulative_leaves(joining_date: date, year: int) -> Dict:
     }
 
 
-def get_organization_holidays(year: int) -> List[Dict]:
+def get_organization_holidays_view(year: int) -> List[Dict]:
     """
-    Get organization holidays for a given year
+    Get organization holidays for a given year, formatted for API responses
     
     FIXED VERSION:
     - Uses correct column name 'holiday_name' instead of 'holiday_event'
     - Returns list of holiday dictionaries
+    - Leave calculations should use get_holiday_ordinals instead
     """
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        query = """
-            SELECT
-                id,
-                holiday_date,
-                holiday_name,
-                TO_CHAR(holiday_date, 'FMDay') as weekday,
-                TO_CHAR(holiday_date, 'DD') as day,
-                TO_CHAR(holiday_date, 'Month') as month_name
-            FROM organization_holidays
-            WHERE EXTRACT(YEAR FROM holiday_date) = %s
-            ORDER BY holiday_date;
-        """
-
-        cursor.execute(query, (year,))
+        cursor.execute(_SQL_HOLIDAYS_VIEW, (year,))
         rows = cursor.fetchall()
 
         holidays = []
         for row in rows:
-            # Handle both dict-like and tuple-like cursor results
-            if hasattr(row, 'keys'):
-                # Dict-like (RealDictCursor)
-                holidays.append({
-                    "id": row['id'],
-                    "holiday_date": row['holiday_date'].strftime('%Y-%m-%d'),
-                    "holiday_name": row['holiday_name'],
-                    "weekday": row['weekday'],
-                    "day": row['day'].strip() if row['day'] else None,
-                    "month": row['month_name'].strip() if row['month_name'] else None
-                })
-            else:
-                # Tuple-like (standard cursor)
-                holidays.append({
-                    "id": row[0],
-                    "holiday_date": row[1].strftime('%Y-%m-%d') if row[1] else None,
-                    "holiday_name": row[2],
-                    "weekday": row[3],
-                    "day": row[4].strip() if row[4] else None,
-                    "month": row[5].strip() if row[5] else None
-                })
-
-        logger.info(f"Found {len(holidays)} holidays for year {year}")
+            holidays.append({
+                "id": row['id'],
+                "holiday_date": row['holiday_date'].strftime('%Y-%m-%d'),
+                "holiday_name": row['holiday_name'],
+                "weekday": row['weekday'],
+                "day": row['day'].strip() if row['day'] else None,
+                "month": row['month_name'].strip() if row['month_name'] else None
+            })
+
+        logger.info("Found %s holidays for year %s", len(holidays), year)
         return holidays
 
     except Exception as e:
-        logger.error(f"Error fetching organization holidays: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("Error fetching organization holidays: %s", e)
         return []  # Return empty list instead of crashing
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
+
+
+def get_holiday_ordinals(year: int) -> FrozenSet[int]:
+    """
+    Return the holiday dates of a year as date ordinals, cached per process.
+
+    Entries are dropped by the holiday cache listener whenever
+    organization_holidays changes, so a miss only happens on first use or
+    right after an edit. Until this process's listener is subscribed,
+    entries older than HOLIDAY_CACHE_TTL_SECONDS are re-read.
+    """
+    start_holiday_cache_listener()
+    subscribed = is_notify_subscribed(HOLIDAYS_CHANGED_CHANNEL)
+    with _HOLIDAYS_LOCK:
+        cached = _HOLIDAYS.get(year)
+        generation = _holidays_generation
+    if cached is not None:
+        ordinals, fetched_at = cached
+        if subscribed or time.monotonic() - fetched_at < HOLIDAY_CACHE_TTL_SECONDS:
+            return ordinals
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_SQL_HOLIDAY_DATES, (year,))
+        ordinals = frozenset(row['holiday_date'].toordinal() for row in cursor.fetchall())
+    except Exception as e:
+        logger.exception("Error fetching holiday dates: %s", e)
+        return frozenset()
+    finally:
+        cursor.close()
+        return_connection(conn)
+
+    with _HOLIDAYS_LOCK:
+        # Skip caching if an invalidation raced with the SELECT above.
+        if generation == _holidays_generation:
+            _HOLIDAYS[year] = (ordinals, time.monotonic())
+    return ordinals
+
+
+def invalidate_holiday_cache(year: Optional[int] = None) -> None:
+    """Drop cached holidays for one year, or for every year when year is None"""
+    global _holidays_generation
+    with _HOLIDAYS_LOCK:
+        _holidays_generation += 1
+        if year is None:
+            _HOLIDAYS.clear()
+        else:
+            _HOLIDAYS.pop(year, None)
+
+
+def _handle_holiday_notify(payload: str) -> None:
+    try:
+        year = int(payload)
+    except (TypeError, ValueError):
+        year = None
+    invalidate_holiday_cache(year)
+    logger.info("Holiday cache invalidated (year=%s)", year if year is not None else 'all')
+
+
+def start_holiday_cache_listener() -> None:
+    """Start this process's LISTEN thread that keeps the holiday cache fresh"""
+    start_notify_listener(HOLIDAYS_CHANGED_CHANNEL, _handle_holiday_notify, invalidate_holiday_cache)
 
 
 def calculate_leave_count(start_date: date, end_date: date, duration: str, year: int) -> float:
@@ -131,21 +403,11 @@ def calculate_leave_count(start_date: date, end_date: date, duration: str, year:
     
     FIXED VERSION:
     - Takes year parameter instead of holidays list
-    - Fetches holidays internally
+    - Reads holidays from the process-wide holiday cache
     """
     
-    # Get holidays for the year
-    holidays_data = get_organization_holidays(year)
-    holiday_dates = []
-    
-    for h in holidays_data:
-        try:
-            holiday_date = datetime.strptime(h['holiday_date'], '%Y-%m-%d').date()
-            holiday_dates.append(holiday_date)
-        except Exception as e:
-            logger.warning(f"Could not parse holiday date {h.get('holiday_date')}: {e}")
-            continue
-    
+    holiday_ordinals = get_holiday_ordinals(year)
+
     working_days = []
     current = start_date
 
@@ -163,7 +425,7 @@ def calculate_leave_count(start_date: date, end_date: date, duration: str, year:
                 continue
         
         # Skip holidays
-        if current in holiday_dates:
+        if current.toordinal() in holiday_ordinals:
             current += timedelta(days=1)
             continue
         
@@ -184,33 +446,31 @@ def calculate_leave_count(start_date: date, end_date: date, duration: str, year:
     return 0
 
 
-def get_late_arrival_count(emp_code: str, from_date: date, to_date: date) -> int:
-    """Count late arrivals in a period"""
+def get_attendance_deduction_counts(emp_code: str, from_date: date, to_date: date) -> Dict:
+    """Count late arrivals and short (<= 4 hours) working days in one attendance scan"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
         late_cutoff = datetime.strptime(Config.LATE_LOGIN_CUTOFF, "%H:%M").time()
         
-        cursor.execute("""
-            SELECT COUNT(*) as late_count
-            FROM attendance
-            WHERE employee_email = (SELECT emp_email FROM employees WHERE emp_code = %s)
-            AND date BETWEEN %s AND %s
-            AND login_time IS NOT NULL
-            AND COALESCE(is_compoff_session, FALSE) = FALSE
-            AND EXTRACT(HOUR FROM login_time) * 60 + EXTRACT(MINUTE FROM login_time) > 
-                EXTRACT(HOUR FROM %s::time) * 60 + EXTRACT(MINUTE FROM %s::time)
-        """, (emp_code, from_date, to_date, late_cutoff, late_cutoff))
+        cursor.execute(_SQL_ATTENDANCE_DEDUCTION_COUNTS, (late_cutoff, emp_code, from_date, to_date))
         
         result = cursor.fetchone()
-        return result['late_count'] if result else 0
+        if not result:
+            return {'late_count': 0, 'short_days': 0}
+        return {'late_count': result['late_count'], 'short_days': result['short_days']}
     except Exception as e:
-        logger.error(f"Error counting late arrivals: {e}")
-        return 0
+        logger.error("Error counting attendance deductions: %s", e)
+        return {'late_count': 0, 'short_days': 0}
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
+
+
+def get_late_arrival_count(emp_code: str, from_date: date, to_date: date) -> int:
+    """Count late arrivals in a period"""
+    return get_attendance_deduction_counts(emp_code, from_date, to_date)['late_count']
 
 
 def calculate_late_arrival_lop_deduction(late_arrivals: int) -> float:
@@ -245,27 +505,7 @@ def get_monthly_late_arrival_lop_summary(
 
 def get_short_working_days(emp_code: str, from_date: date, to_date: date) -> int:
     """Count days with <= 4 hours work"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("""
-            SELECT COUNT(*) as short_days
-            FROM attendance
-            WHERE employee_email = (SELECT emp_email FROM employees WHERE emp_code = %s)
-            AND date BETWEEN %s AND %s
-            AND working_hours IS NOT NULL
-            AND working_hours <= 4
-        """, (emp_code, from_date, to_date))
-        
-        result = cursor.fetchone()
-        return result['short_days'] if result else 0
-    except Exception as e:
-        logger.error(f"Error counting short working days: {e}")
-        return 0
-    finally:
-        cursor.close()
-        conn.close()
+    return get_attendance_deduction_counts(emp_code, from_date, to_date)['short_days']
 
 
 def calculate_auto_deductions(emp_code: str, month: int, year: int) -> Dict:
@@ -274,15 +514,21 @@ def calculate_auto_deductions(emp_code: str, month: int, year: int) -> Dict:
     - >3 late arrivals = 0.5 day leave
     - Working hours ≤ 4 = 0.5 day leave per day
     """
+    start_date, end_date = _month_bounds(month, year)
+    counts = get_attendance_deduction_counts(emp_code, start_date, end_date)
+    return _build_auto_deductions(counts['late_count'], counts['short_days'])
+
+
+def _month_bounds(month: int, year: int) -> Tuple[date, date]:
     start_date = date(year, month, 1)
     if month == 12:
         end_date = date(year, 12, 31)
     else:
         end_date = date(year, month + 1, 1) - timedelta(days=1)
-    
-    late_arrivals = get_late_arrival_count(emp_code, start_date, end_date)
-    short_days = get_short_working_days(emp_code, start_date, end_date)
-    
+    return start_date, end_date
+
+
+def _build_auto_deductions(late_arrivals: int, short_days: int) -> Dict:
     return {
         'late_arrivals': {
             'count': late_arrivals,
@@ -307,65 +553,86 @@ def get_employee_leave_balance(emp_code: str) -> Dict:
 
     try:
         # Get employee joining date
-        cursor.execute("""
-            SELECT emp_joined_date
-            FROM employees
-            WHERE emp_code = %s
-        """, (emp_code,))
+        cursor.execute(_SQL_BALANCE_EMP, (emp_code,))
         
         emp = cursor.fetchone()
         if not emp:
             return {"error": "Employee not found"}
 
-        joining_date = emp['emp_joined_date'] or date.today()
-        if isinstance(joining_date, str):
-            joining_date = datetime.strptime(joining_date, "%Y-%m-%d").date()
+        # Get used (approved) leaves this year — pending requests do not reduce balance
+        cursor.execute(_SQL_BALANCE_USED, (emp_code, datetime.now().year))
 
-        year = datetime.now().year
-        
-        # Calculate accrued leaves based on months worked
-        accrued = calculate_cumulative_leaves(joining_date, year)
+        used = cursor.fetchone()
 
-        # Get used (approved) leaves this year — pending requests do not reduce balance
-        cursor.execute("""
-            SELECT leave_type, SUM(leave_count) AS used
-            FROM leaves
-            WHERE emp_code = %s
-              AND EXTRACT(YEAR FROM from_date) = %s
-              AND status = 'approved'
-            GROUP BY leave_type
-        """, (emp_code, year))
-
-        used = {row['leave_type']: float(row['used']) for row in cursor.fetchall()}
-
-        return {
-            'casual': {
-                'max': accrued['casual'],
-                'used': used.get('casual', 0),
-                'remaining': accrued['casual'] - used.get('casual', 0)
-            },
-            'sick': {
-                'max': accrued['sick'],
-                'used': used.get('sick', 0),
-                'remaining': accrued['sick'] - used.get('sick', 0)
-            },
-            '_info': {
-                'accrual_type': 'fixed',
-                'months_counted': accrued['months'],
-                'total_leaves': 18,
-                'joining_date': joining_date.strftime('%d-%m-%Y'),
-                'note': 'Fixed 18 leaves per year (12 Casual + 6 Sick)'
-            }
-        }
+        return _build_balance(emp['emp_joined_date'], used)
 
     except Exception as e:
-        logger.error(f"Error getting leave balance: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("Error getting leave balance: %s", e)
         return {"error": str(e)}
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
+
+
+def _build_balance(joining_date, used) -> Dict:
+    """Shape accrued vs. used (casual_used/sick_used) leaves into the balance payload"""
+    joining_date = joining_date or date.today()
+    if isinstance(joining_date, str):
+        joining_date = datetime.strptime(joining_date, "%Y-%m-%d").date()
+
+    # Calculate accrued leaves based on months worked
+    accrued = calculate_cumulative_leaves(joining_date, datetime.now().year)
+
+    return {
+        'casual': {
+            'max': accrued['casual'],
+            'used': used['casual_used'],
+            'remaining': accrued['casual'] - used['casual_used']
+        },
+        'sick': {
+            'max': accrued['sick'],
+            'used': used['sick_used'],
+            'remaining': accrued['sick'] - used['sick_used']
+        },
+        '_info': {
+            'accrual_type': 'fixed',
+            'months_counted': accrued['months'],
+            'total_leaves': 18,
+            'joining_date': joining_date.strftime('%d-%m-%Y'),
+            'note': 'Fixed 18 leaves per year (12 Casual + 6 Sick)'
+        }
+    }
+
+
+def get_balance_and_deductions(emp_code: str, month: int, year: int) -> Tuple[Dict, Dict]:
+    """
+    Leave balance plus auto-deductions for month/year from one query,
+    shaped exactly like get_employee_leave_balance/calculate_auto_deductions.
+    """
+    start_date, end_date = _month_bounds(month, year)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        late_cutoff = datetime.strptime(Config.LATE_LOGIN_CUTOFF, "%H:%M").time()
+        cursor.execute(_SQL_BALANCE_AND_DEDUCTIONS, (
+            datetime.now().year, late_cutoff, start_date, end_date, emp_code
+        ))
+
+        row = cursor.fetchone()
+        if not row:
+            return {"error": "Employee not found"}, _build_auto_deductions(0, 0)
+
+        return (
+            _build_balance(row['emp_joined_date'], row),
+            _build_auto_deductions(row['late_count'], row['short_days'])
+        )
+    except Exception as e:
+        logger.exception("Error getting leave balance and deductions: %s", e)
+        return {"error": str(e)}, _build_auto_deductions(0, 0)
+    finally:
+        cursor.close()
+        return_connection(conn)
 
 
 # =========================
@@ -396,16 +663,7 @@ def apply_leave(emp_code: str, from_date: str, to_date: str, leave_type: str,
 
     try:
         # Get employee and manager details
-        cursor.execute("""
-            SELECT e.emp_code, e.emp_full_name, e.emp_email,
-                   e.emp_manager, e.emp_informing_manager,
-                   m.emp_email AS manager_email, m.emp_full_name AS manager_name,
-                   im.emp_email AS informing_email, im.emp_full_name AS informing_name
-            FROM employees e
-            LEFT JOIN employees m ON e.emp_manager = m.emp_code
-            LEFT JOIN employees im ON e.emp_informing_manager = im.emp_code
-            WHERE e.emp_code = %s
-        """, (emp_code,))
+        cursor.execute(_SQL_APPLY_EMP, (emp_code,))
 
         emp = cursor.fetchone()
         if not emp:
@@ -417,7 +675,7 @@ def apply_leave(emp_code: str, from_date: str, to_date: str, leave_type: str,
         approver_name = emp['manager_name']
 
         if approver_code and is_employee_on_leave(approver_code):
-            logger.info(f"Manager {approver_code} is on leave, using informing manager")
+            logger.info("Manager %s is on leave, using informing manager", approver_code)
             approver_code = emp['emp_informing_manager']
             approver_email = emp['informing_email']
             approver_name = emp['informing_name']
@@ -425,14 +683,20 @@ def apply_leave(emp_code: str, from_date: str, to_date: str, leave_type: str,
         if not approver_code:
             return ({"success": False, "message": "No approver available"}, 400)
 
-        # Calculate leave count using the FIXED function
+        # Calculate leave count using the FIXED function (holidays are cached)
         leave_count = calculate_leave_count(start_date, end_date, duration, start_date.year)
 
         if leave_count == 0:
             return ({"success": False, "message": "No working days in selected period"}, 400)
 
+        # The balance is read on its own connection while the overlap check
+        # runs here; the balance error still takes precedence.
+        balance_future = _LOOKUP_EXECUTOR.submit(get_employee_leave_balance, emp_code)
+        cursor.execute(_SQL_APPLY_OVERLAP, (emp_code, start_date, start_date, end_date, end_date, start_date, end_date))
+        overlapping = cursor.fetchone()
+
         # Check balance
-        balance = get_employee_leave_balance(emp_code)
+        balance = balance_future.result()
         if 'error' in balance:
             return ({"success": False, "message": balance['error']}, 500)
 
@@ -444,38 +708,18 @@ def apply_leave(emp_code: str, from_date: str, to_date: str, leave_type: str,
             }, 400)
 
         # Check for overlapping leaves
-        cursor.execute("""
-            SELECT * FROM leaves
-            WHERE emp_code = %s
-            AND status IN ('pending', 'approved')
-            AND (
-                (from_date <= %s AND to_date >= %s) OR
-                (from_date <= %s AND to_date >= %s) OR
-                (from_date >= %s AND to_date <= %s)
-            )
-        """, (emp_code, start_date, start_date, end_date, end_date, start_date, end_date))
-
-        if cursor.fetchone():
+        if overlapping:
             return ({"success": False, "message": "Overlapping leave request exists"}, 400)
 
         # Insert leave request
-        cursor.execute("""
-            INSERT INTO leaves (
-                emp_code, emp_name, emp_email,
-                manager_code, manager_email,
-                from_date, to_date, leave_type, duration,
-                leave_count, notes, status, applied_at
-            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,'pending',%s)
-            RETURNING id
-        """, (
+        cursor.execute(_SQL_APPLY_INSERT, (
             emp_code, emp['emp_full_name'], emp['emp_email'],
             approver_code, approver_email,
             start_date, end_date, leave_type, duration,
             leave_count, notes, datetime.now()
         ))
 
-        result = cursor.fetchone()
-        leave_id = result['id'] if hasattr(result, 'keys') else result[0]
+        leave_id = cursor.fetchone()['id']
         conn.commit()
 
         return ({
@@ -494,13 +738,11 @@ def apply_leave(emp_code: str, from_date: str, to_date: str, leave_type: str,
 
     except Exception as e:
         conn.rollback()
-        logger.error(f"Apply leave error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("Apply leave error: %s", e)
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
@@ -517,27 +759,22 @@ def approve_leave(leave_id: int, manager_code: str, action: str, remarks: str =
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT * FROM leaves WHERE id = %s AND manager_code = %s
-        """, (leave_id, manager_code))
+        execute_prepared(cursor, _STMT_REVIEW_PENDING_LEAVE, (
+            action, manager_code, datetime.now(), remarks, leave_id, manager_code
+        ))
         
         leave = cursor.fetchone()
         if not leave:
-            return ({"success": False, "message": "Leave request not found or unauthorized"}, 404)
-        
-        leave_status = leave['status'] if hasattr(leave, 'keys') else leave[12]  # Adjust index as needed
-        if leave_status != 'pending':
-            return ({"success": False, "message": f"Leave already {leave_status}"}, 400)
-        
-        cursor.execute("""
-            UPDATE leaves
-            SET status = %s, reviewed_by = %s, reviewed_at = %s, remarks = %s
-            WHERE id = %s
-        """, (action, manager_code, datetime.now(), remarks, leave_id))
+            execute_prepared(cursor, _STMT_LEAVE_STATUS_BY_ID_MGR, (leave_id, manager_code))
+            existing = cursor.fetchone()
+            if not existing:
+                return ({"success": False, "message": "Leave request not found or unauthorized"}, 404)
+            return ({"success": False, "message": f"Leave already {existing['status']}"}, 400)
         
         conn.commit()
+        clear_on_leave_cache()
         
-        emp_name = leave['emp_name'] if hasattr(leave, 'keys') else leave[2]
+        emp_name = leave['emp_name']
         
         return ({
             "success": True,
@@ -551,55 +788,48 @@ def approve_leave(leave_id: int, manager_code: str, action: str, remarks: str =
         
     except Exception as e:
         conn.rollback()
-        logger.error(f"Approve leave error: {e}")
+        logger.error("Approve leave error: %s", e)
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 # =========================
 # GET LEAVES
 # =========================
 
+def _fetch_leave_rows(conn, query: str, params, limit: int) -> List[Dict]:
+    """
+    Read leave rows as dicts. Bounded listings use one fetchall(); above
+    LEAVES_STREAM_THRESHOLD rows a server-side cursor is used so the driver
+    never buffers the raw result next to the returned list.
+    """
+    if limit <= LEAVES_STREAM_THRESHOLD:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return [dict(leave) for leave in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    with conn.cursor(name='leaves_stream') as stream:
+        stream.itersize = LEAVES_STREAM_ITERSIZE
+        stream.execute(query, params)
+        return [dict(leave) for leave in stream]
+
+
 def get_my_leaves(emp_code: str, status: str = None, limit: int = 50) -> Tuple[Dict, int]:
     """Get employee's leave requests"""
     conn = get_db_connection()
-    cursor = conn.cursor()
     
     try:
-        query = "SELECT * FROM leaves WHERE emp_code = %s"
-        params = [emp_code]
-        
         if status:
-            query += " AND status = %s"
-            params.append(status)
-        
-        query += " ORDER BY applied_at DESC LIMIT %s"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        leaves = cursor.fetchall()
+            query, params = _SQL_MY_LEAVES_BY_STATUS, (emp_code, status, limit)
+        else:
+            query, params = _SQL_MY_LEAVES, (emp_code, limit)
         
-        # Convert to list of dicts if needed
-        leaves_list = []
-        for leave in leaves:
-            if hasattr(leave, 'keys'):
-                leave_dict = dict(leave)
-            else:
-                # Handle tuple results - adjust indices based on your table structure
-                leave_dict = {
-                    'id': leave[0],
-                    'emp_code': leave[1],
-                    # Add other fields as needed
-                }
-            
-            # Format dates
-            for key, value in leave_dict.items():
-                if isinstance(value, (datetime, date)):
-                    leave_dict[key] = value.strftime('%d-%m-%Y' if isinstance(value, date) else '%Y-%m-%d %H:%M:%S')
-            
-            leaves_list.append(leave_dict)
+        leaves_list = _fetch_leave_rows(conn, query, params, limit)
         
         balance = get_employee_leave_balance(emp_code)
         
@@ -612,43 +842,20 @@ def get_my_leaves(emp_code: str, status: str = None, limit: int = 50) -> Tuple[D
             }
         }, 200)
     finally:
-        cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_team_leaves(manager_code: str, status: str = None, limit: int = 50) -> Tuple[Dict, int]:
     """Get leave requests for manager's team"""
     conn = get_db_connection()
-    cursor = conn.cursor()
     
     try:
-        query = "SELECT * FROM leaves WHERE manager_code = %s"
-        params = [manager_code]
-        
         if status:
-            query += " AND status = %s"
-            params.append(status)
-        
-        query += " ORDER BY applied_at DESC LIMIT %s"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        leaves = cursor.fetchall()
+            query, params = _SQL_TEAM_LEAVES_BY_STATUS, (manager_code, status, limit)
+        else:
+            query, params = _SQL_TEAM_LEAVES, (manager_code, limit)
         
-        # Convert to list of dicts
-        leaves_list = []
-        for leave in leaves:
-            if hasattr(leave, 'keys'):
-                leave_dict = dict(leave)
-            else:
-                leave_dict = {'id': leave[0]}  # Adjust as needed
-            
-            # Format dates
-            for key, value in leave_dict.items():
-                if isinstance(value, (datetime, date)):
-                    leave_dict[key] = value.strftime('%d-%m-%Y' if isinstance(value, date) else '%Y-%m-%d %H:%M:%S')
-            
-            leaves_list.append(leave_dict)
+        leaves_list = _fetch_leave_rows(conn, query, params, limit)
         
         return ({
             "success": True,
@@ -658,8 +865,7 @@ def get_team_leaves(manager_code: str, status: str = None, limit: int = 50) -> T
             }
         }, 200)
     finally:
-        cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def cancel_leave(leave_id: int, emp_code: str) -> Tuple[Dict, int]:
@@ -668,31 +874,23 @@ def cancel_leave(leave_id: int, emp_code: str) -> Tuple[Dict, int]:
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT * FROM leaves
-            WHERE id = %s AND emp_code = %s AND status = 'pending'
-        """, (leave_id, emp_code))
+        execute_prepared(cursor, _STMT_CANCEL_OWN_PENDING_LEAVE, (datetime.now(), leave_id, emp_code))
         
-        leave = cursor.fetchone()
-        if not leave:
+        if not cursor.fetchone():
             return ({"success": False, "message": "Leave not found or cannot be cancelled"}, 404)
         
-        cursor.execute("""
-            UPDATE leaves SET status = 'cancelled', updated_at = %s
-            WHERE id = %s
-        """, (datetime.now(), leave_id))
-        
         conn.commit()
+        clear_on_leave_cache()
         
         return ({"success": True, "message": "Leave request cancelled"}, 200)
         
     except Exception as e:
         conn.rollback()
-        logger.error(f"Cancel leave error: {e}")
+        logger.error("Cancel leave error: %s", e)
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_leave_summary(emp_code: str, year: int = None) -> Tuple[Dict, int]:
@@ -700,9 +898,7 @@ def get_leave_summary(emp_code: str, year: int = None) -> Tuple[Dict, int]:
     if not year:
         year = datetime.now().year
     
-    balance = get_employee_leave_balance(emp_code)
-    current_month = datetime.now().month
-    deductions = calculate_auto_deductions(emp_code, current_month, year)
+    balance, deductions = get_balance_and_deductions(emp_code, datetime.now().month, year)
     
     return ({
         "success": True,
@@ -3,13 +3,173 @@ Location Tracking Service
 Periodic location tracking for active activities (every 5 minutes)
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from database.connection import get_db_connection
-from services.geocoding_service import get_address_from_coordinates
+from math import radians, sin, cos, sqrt, atan2
+from typing import Dict, List, Set
+from database.connection import (
+    get_db_connection,
+    is_notify_subscribed,
+    return_connection,
+    start_notify_listener,
+)
+from database.prepared import PreparedStatement, execute_prepared
+from services.geocoding_service import grid_cell, lookup_cached_address, peek_cached_address
 import logging
+import psycopg2
+import threading
+from psycopg2.extras import execute_values
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0
+MAX_BULK_TRACKING_POINTS = 500
+
+# Geocodes uncached tracking points after the insert has committed, one grid
+# cell at a time; lookup_cached_address() paces the Nominatim requests.
+_GEOCODE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tracking-geocode')
+
+# Active activities keyed by id. NOTIFYs on this channel (see migration 018)
+# mark single ids dirty, and only those rows are re-read; the whole set is
+# re-read every ACTIVE_CACHE_RESYNC_RUNS scheduler runs, or on every call
+# while this process's listener is not subscribed. The listener is started
+# per process on first use, so forked gunicorn workers each run their own.
+ACTIVITIES_CHANGED_CHANNEL = 'activities_changed'
+ACTIVE_CACHE_RESYNC_RUNS = 10
+_ACTIVE_ACTIVITIES: Dict[int, dict] = {}
+_ACTIVE_LOCK = threading.Lock()
+_active_dirty_ids: Set[int] = set()
+_active_needs_resync = True
+_active_track_runs = 0
+
+_STMT_ACTIVITY_ACTIVE_CHECK = PreparedStatement('activity_active_check', ('int', 'text'), """
+    SELECT id, activity_type, employee_email
+    FROM activities
+    WHERE id = %s AND status = 'active' AND employee_email = %s
+""")
+
+_STMT_INSERT_TRACKING = PreparedStatement(
+    'insert_tracking',
+    ('int', 'text', 'text', 'text', 'timestamp', 'text'),
+    """
+    INSERT INTO location_tracking (
+        activity_id, employee_email, location, address,
+        tracked_at, tracking_type
+    ) VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id
+    """,
+)
+
+_SQL_INSERT_TRACKING_BULK = """
+    INSERT INTO location_tracking (
+        activity_id, employee_email, location, address,
+        tracked_at, tracking_type
+    ) VALUES %s
+    RETURNING id
+"""
+
+_SQL_SET_TRACKING_ADDRESS = """
+    UPDATE location_tracking SET address = %s WHERE id = ANY(%s)
+"""
+
+# Rows written before migration 019 get latitude/longitude in batches of
+# this many, each in its own short transaction; re-setting location fires
+# the trigger that parses it. Walks ids upwards, so rows whose location
+# does not parse are visited once.
+TRACKING_BACKFILL_BATCH_SIZE = 5000
+
+_SQL_BACKFILL_COORDINATES = """
+    UPDATE location_tracking SET location = location
+    WHERE id IN (
+        SELECT id FROM location_tracking
+        WHERE latitude IS NULL AND location IS NOT NULL AND id > %s
+        ORDER BY id
+        LIMIT %s
+    )
+    RETURNING id
+"""
+
+# Timestamps come back as 'YYYY-MM-DD HH24:MI:SS' strings; latitude and
+# longitude are read from the numeric columns (migration 019) and rendered
+# as text, as the API has always returned them. ORDER BY uses the qualified
+# column so it sorts the timestamp rather than the formatted alias.
+_SQL_TRACKING_HISTORY = """
+    SELECT id, activity_id, employee_email, location, address,
+           to_char(tracked_at, 'YYYY-MM-DD HH24:MI:SS') AS tracked_at,
+           tracking_type,
+           COALESCE(latitude::text, '') AS latitude,
+           COALESCE(longitude::text, '') AS longitude
+    FROM location_tracking
+    WHERE activity_id = %s
+    ORDER BY location_tracking.tracked_at ASC
+"""
+
+_SQL_EMPLOYEE_TRACKING_SUMMARY = """
+    SELECT a.id, a.attendance_id, a.field_visit_id,
+           a.employee_email, a.employee_name, a.activity_type,
+           to_char(a.start_time, 'YYYY-MM-DD HH24:MI:SS') AS start_time,
+           to_char(a.end_time, 'YYYY-MM-DD HH24:MI:SS') AS end_time,
+           a.start_location, a.start_address, a.end_location, a.end_address,
+           a.duration_minutes, a.notes, a.date, a.status, a.destinations,
+           to_char(a.created_at, 'YYYY-MM-DD HH24:MI:SS') AS created_at,
+           COUNT(lt.id) AS tracking_count
+    FROM activities a
+    LEFT JOIN location_tracking lt ON a.id = lt.activity_id
+    WHERE a.employee_email = %s AND a.date = %s
+    GROUP BY a.id
+    ORDER BY a.start_time DESC
+"""
+
+_SQL_ACTIVE_ACTIVITIES = """
+    SELECT id, employee_email, activity_type, start_time
+    FROM activities
+    WHERE status = 'active'
+"""
+
+_SQL_ACTIVE_ACTIVITIES_BY_ID = """
+    SELECT id, employee_email, activity_type, start_time
+    FROM activities
+    WHERE id = ANY(%s) AND status = 'active'
+"""
+
+_SQL_TRACKING_COUNTS = """
+    SELECT activity_id, COUNT(*) AS count
+    FROM location_tracking
+    WHERE activity_id = ANY(%s)
+    GROUP BY activity_id
+"""
+
+# Haversine over consecutive route points, summed in Postgres so only one
+# row comes back. The first point is the activity's start_location (parsed
+# and passed in), followed by the tracking points in tracked_at order.
+# Points without coordinates are skipped, as in _path_distance_km.
+_SQL_ROUTE_DISTANCE = """
+    WITH coords AS (
+        SELECT 0 AS seq, NULL::timestamp AS tracked_at, NULL::int AS id,
+               radians(%s::float8) AS lat, radians(%s::float8) AS lon
+        UNION ALL
+        SELECT 1, tracked_at, id, radians(latitude), radians(longitude)
+        FROM location_tracking
+        WHERE activity_id = %s
+    ),
+    segments AS (
+        SELECT lat, lon,
+               LAG(lat) OVER w AS prev_lat,
+               LAG(lon) OVER w AS prev_lon
+        FROM coords
+        WHERE lat IS NOT NULL AND lon IS NOT NULL
+        WINDOW w AS (ORDER BY seq, tracked_at, id)
+    )
+    SELECT
+        (SELECT COUNT(*) FROM coords WHERE seq = 1) AS tracking_points,
+        COALESCE(SUM(2 * asin(LEAST(1.0, sqrt(
+            power(sin((lat - prev_lat) / 2), 2)
+            + cos(prev_lat) * cos(lat) * power(sin((lon - prev_lon) / 2), 2)
+        )))), 0) * 6371.0 AS distance_km
+    FROM segments
+    WHERE prev_lat IS NOT NULL
+"""
+
 
 def track_location(activity_id, emp_email, lat, lon, tracking_type='auto'):
     """
@@ -26,18 +186,16 @@ def track_location(activity_id, emp_email, lat, lon, tracking_type='auto'):
         return ({"success": False, "message": "Location coordinates required"}, 400)
     
     location = f"{lat}, {lon}"
-    address = get_address_from_coordinates(lat, lon)
+    # Only use an address that is already cached; otherwise store the
+    # coordinates and geocode after the insert commits
+    address = peek_cached_address(lat, lon)
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
         # Verify activity is active
-        cursor.execute("""
-            SELECT id, activity_type, employee_email 
-            FROM activities
-            WHERE id = %s AND status = 'active' AND employee_email = %s
-        """, (activity_id, emp_email))
+        execute_prepared(cursor, _STMT_ACTIVITY_ACTIVE_CHECK, (activity_id, emp_email))
         
         activity = cursor.fetchone()
         
@@ -47,20 +205,17 @@ def track_location(activity_id, emp_email, lat, lon, tracking_type='auto'):
         tracked_at = datetime.now()
         
         # Insert tracking point
-        cursor.execute("""
-            INSERT INTO location_tracking (
-                activity_id, employee_email, location, address,
-                tracked_at, tracking_type
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            activity_id, emp_email, location, address,
+        execute_prepared(cursor, _STMT_INSERT_TRACKING, (
+            activity_id, emp_email, location, address or location,
             tracked_at, tracking_type
         ))
         
         tracking_id = cursor.fetchone()['id']
         conn.commit()
         
+        if address is None:
+            _GEOCODE_EXECUTOR.submit(_fill_tracking_addresses, [tracking_id], lat, lon)
+        
         return ({
             "success": True,
             "message": "Location tracked",
@@ -72,7 +227,7 @@ def track_location(activity_id, emp_email, lat, lon, tracking_type='auto'):
                     "coordinates": location,
                     "latitude": lat,
                     "longitude": lon,
-                    "address": address
+                    "address": address or location
                 },
                 "tracking_type": tracking_type
             }
@@ -80,70 +235,269 @@ def track_location(activity_id, emp_email, lat, lon, tracking_type='auto'):
         
     except Exception as e:
         conn.rollback()
-        logger.error(f"Track location error: {e}")
+        logger.error("Track location error: %s", e)
         return ({"success": False, "message": str(e)}, 500)
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
-def get_active_activities():
-    """Get all active activities that need tracking"""
+def track_locations_bulk(activity_id, emp_email, points, tracking_type='auto'):
+    """
+    Track a batch of locations for an active activity in one INSERT
+    
+    Args:
+        activity_id: ID of the active activity
+        emp_email: Employee email
+        points: list of {"latitude", "longitude", "tracked_at" (optional ISO timestamp)}
+        tracking_type: 'auto' (5-min intervals) or 'manual' (user triggered)
+    """
+    if not points or not isinstance(points, list):
+        return ({"success": False, "message": "points must be a non-empty list"}, 400)
+    
+    if len(points) > MAX_BULK_TRACKING_POINTS:
+        return ({
+            "success": False,
+            "message": f"At most {MAX_BULK_TRACKING_POINTS} points per request"
+        }, 400)
+    
+    now = datetime.now()
+    rows = []
+    uncached = []
+    
+    for index, point in enumerate(points):
+        lat = point.get('latitude') if isinstance(point, dict) else None
+        lon = point.get('longitude') if isinstance(point, dict) else None
+        if not lat or not lon:
+            return ({"success": False, "message": f"Point {index}: latitude and longitude required"}, 400)
+        
+        try:
+            tracked_at = datetime.fromisoformat(point['tracked_at']) if point.get('tracked_at') else now
+        except (TypeError, ValueError):
+            return ({"success": False, "message": f"Point {index}: invalid tracked_at"}, 400)
+        
+        location = f"{lat}, {lon}"
+        address = peek_cached_address(lat, lon)
+        if address is None:
+            uncached.append((index, lat, lon))
+        
+        rows.append((activity_id, emp_email, location, address or location, tracked_at, tracking_type))
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT id, employee_email, activity_type, start_time
-            FROM activities
-            WHERE status = 'active'
-            ORDER BY start_time DESC
-        """)
+        # Verify activity is active
+        execute_prepared(cursor, _STMT_ACTIVITY_ACTIVE_CHECK, (activity_id, emp_email))
         
-        activities = cursor.fetchall()
+        if not cursor.fetchone():
+            return ({"success": False, "message": "Active activity not found"}, 404)
+        
+        inserted = execute_values(
+            cursor, _SQL_INSERT_TRACKING_BULK, rows,
+            page_size=MAX_BULK_TRACKING_POINTS, fetch=True
+        )
+        tracking_ids = [row['id'] for row in inserted]
+        conn.commit()
+        
+        # One background geocode per grid cell, patching all of its rows
+        cells = {}
+        for index, lat, lon in uncached:
+            cell = cells.setdefault(grid_cell(lat, lon) or (lat, lon), (lat, lon, []))
+            cell[2].append(tracking_ids[index])
+        for lat, lon, cell_tracking_ids in cells.values():
+            _GEOCODE_EXECUTOR.submit(_fill_tracking_addresses, cell_tracking_ids, lat, lon)
         
         return ({
             "success": True,
+            "message": f"{len(tracking_ids)} locations tracked",
             "data": {
-                "activities": activities,
-                "count": len(activities)
+                "activity_id": activity_id,
+                "tracking_ids": tracking_ids,
+                "tracked_count": len(tracking_ids),
+                "tracking_type": tracking_type
             }
-        }, 200)
+        }, 201)
         
+    except Exception as e:
+        conn.rollback()
+        logger.error("Bulk track location error: %s", e)
+        return ({"success": False, "message": str(e)}, 500)
+    finally:
+        cursor.close()
+        return_connection(conn)
+
+
+def _fill_tracking_addresses(tracking_ids, lat, lon):
+    """Geocode one grid cell in the background and patch the address of its tracking points"""
+    address = lookup_cached_address(lat, lon)
+    if address is None:
+        # The rows already hold the coordinates as their address
+        return
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(_SQL_SET_TRACKING_ADDRESS, (address, list(tracking_ids)))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error("Tracking address update failed for %s: %s", tracking_ids, e)
+    finally:
+        cursor.close()
+        return_connection(conn)
+
+
+def backfill_tracking_coordinates(batch_size=TRACKING_BACKFILL_BATCH_SIZE) -> int:
+    """Fill latitude/longitude on rows that predate migration 019; returns rows visited"""
+    last_id = 0
+    total = 0
+    while True:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(_SQL_BACKFILL_COORDINATES, (last_id, batch_size))
+            ids = [row['id'] for row in cursor.fetchall()]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            return_connection(conn)
+
+        if not ids:
+            return total
+        total += len(ids)
+        last_id = max(ids)
+
+
+def start_tracking_coordinates_backfill() -> None:
+    """Run backfill_tracking_coordinates() once on a background thread"""
+    def run():
+        try:
+            count = backfill_tracking_coordinates()
+            if count:
+                logger.info("Backfilled coordinates on %s tracking rows", count)
+        except Exception:
+            logger.exception("Tracking coordinate backfill failed")
+
+    threading.Thread(target=run, name='tracking-coordinates-backfill', daemon=True).start()
+
+
+def _refresh_active_activities() -> None:
+    """Re-read the dirty ids, or the whole active set when a resync is due"""
+    global _active_needs_resync
+    with _ACTIVE_LOCK:
+        resync = _active_needs_resync or not is_notify_subscribed(ACTIVITIES_CHANGED_CHANNEL)
+        dirty = list(_active_dirty_ids)
+        _active_dirty_ids.clear()
+        _active_needs_resync = False
+
+    if not resync and not dirty:
+        return
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if resync:
+            cursor.execute(_SQL_ACTIVE_ACTIVITIES)
+        else:
+            cursor.execute(_SQL_ACTIVE_ACTIVITIES_BY_ID, (dirty,))
+        rows = {row['id']: row for row in cursor.fetchall()}
+    except Exception:
+        with _ACTIVE_LOCK:
+            _active_needs_resync = True
+        raise
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
+
+    with _ACTIVE_LOCK:
+        if resync:
+            _ACTIVE_ACTIVITIES.clear()
+            _ACTIVE_ACTIVITIES.update(rows)
+            return
+        for activity_id in dirty:
+            if activity_id in rows:
+                _ACTIVE_ACTIVITIES[activity_id] = rows[activity_id]
+            else:
+                _ACTIVE_ACTIVITIES.pop(activity_id, None)
+
+
+def _cached_active_activities() -> List[dict]:
+    """Active activities, newest first, refreshed only where NOTIFYs say so"""
+    start_active_activity_listener()
+    _refresh_active_activities()
+    with _ACTIVE_LOCK:
+        activities = list(_ACTIVE_ACTIVITIES.values())
+    activities.sort(key=lambda a: a['start_time'], reverse=True)
+    return activities
+
+
+def invalidate_active_activity(activity_id=None) -> None:
+    """Mark one activity for re-reading, or the whole set when activity_id is None"""
+    global _active_needs_resync
+    with _ACTIVE_LOCK:
+        if activity_id is None:
+            _active_needs_resync = True
+        else:
+            _active_dirty_ids.add(activity_id)
+
+
+def _handle_activity_notify(payload: str) -> None:
+    try:
+        activity_id = int(payload)
+    except (TypeError, ValueError):
+        activity_id = None
+    invalidate_active_activity(activity_id)
+    logger.debug("Active activity cache invalidated (id=%s)", activity_id if activity_id is not None else 'all')
+
+
+def start_active_activity_listener() -> None:
+    """Start this process's LISTEN thread that keeps the active activity cache fresh"""
+    start_notify_listener(ACTIVITIES_CHANGED_CHANNEL, _handle_activity_notify, invalidate_active_activity)
+
+
+def get_active_activities():
+    """Get all active activities that need tracking"""
+    activities = _cached_active_activities()
+
+    return ({
+        "success": True,
+        "data": {
+            "activities": activities,
+            "count": len(activities)
+        }
+    }, 200)
 
 
 def auto_track_active_activities():
     """
     🚀 AUTOMATIC GPS TRACKING (runs every 3 minutes)
     
-    Periodically tracks all active activities from the database.
+    Periodically tracks all active activities from the cached active set.
     This is called by the APScheduler job.
     
     NOTE: For this to work properly, the mobile app needs to send
     GPS coordinates every 3 minutes via the track_location endpoint.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    global _active_track_runs
+
     try:
-        # Get all active activities
-        cursor.execute("""
-            SELECT id, employee_email, activity_type, start_time
-            FROM activities
-            WHERE status = 'active'
-            ORDER BY start_time DESC
-        """)
-        
-        activities = cursor.fetchall()
+        # Every Nth run re-reads the whole set in case a NOTIFY was missed
+        _active_track_runs += 1
+        if _active_track_runs % ACTIVE_CACHE_RESYNC_RUNS == 0:
+            invalidate_active_activity()
+
+        activities = _cached_active_activities()
         
         if not activities:
             logger.debug("ℹ️ No active activities to track")
             return
         
-        logger.info(f"📍 GPS Tracking Check: {len(activities)} active activities")
+        logger.debug("📍 GPS Tracking Check: %s active activities", len(activities))
         
         # Note: This is a scheduler job that checks for active activities
         # The actual location data must be sent by the mobile app via /track endpoint
@@ -154,15 +508,22 @@ def auto_track_active_activities():
         
         activity_ids = [a['id'] for a in activities]
         
-        # Log summary of what's being tracked
-        for activity in activities:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM location_tracking
-                WHERE activity_id = %s
-            """, (activity['id'],))
-            
-            tracking_count = cursor.fetchone()['count']
-            logger.debug(f"   Activity {activity['id']}: {activity['activity_type']} - {tracking_count} tracking points")
+        # Log summary of what's being tracked (one grouped query, debug only)
+        if logger.isEnabledFor(logging.DEBUG):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(_SQL_TRACKING_COUNTS, (activity_ids,))
+                counts = {row['activity_id']: row['count'] for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+                return_connection(conn)
+
+            for activity in activities:
+                logger.debug(
+                    "   Activity %s: %s - %s tracking points",
+                    activity['id'], activity['activity_type'], counts.get(activity['id'], 0)
+                )
         
         return {
             "status": "checking",
@@ -171,12 +532,7 @@ def auto_track_active_activities():
         }
         
     except Exception as e:
-        logger.error(f"❌ Auto track error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-    finally:
-        cursor.close()
-        conn.close()
+        logger.exception("❌ Auto track error: %s", e)
 
 
 def get_tracking_history(activity_id):
@@ -185,24 +541,10 @@ def get_tracking_history(activity_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT * FROM location_tracking
-            WHERE activity_id = %s
-            ORDER BY tracked_at ASC
-        """, (activity_id,))
+        cursor.execute(_SQL_TRACKING_HISTORY, (activity_id,))
         
         points = cursor.fetchall()
         
-        # Parse coordinates and convert datetime
-        for point in points:
-            for key, value in point.items():
-                if isinstance(value, datetime):
-                    point[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-            
-            coords = point.get('location', '').split(', ')
-            point['latitude'] = coords[0] if len(coords) > 0 else ''
-            point['longitude'] = coords[1] if len(coords) > 1 else ''
-        
         return ({
             "success": True,
             "data": {
@@ -213,7 +555,7 @@ def get_tracking_history(activity_id):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def get_employee_tracking_summary(emp_email, date=None):
@@ -226,24 +568,10 @@ def get_employee_tracking_summary(emp_email, date=None):
             date = datetime.now().date()
         
         # Get all activities for the date
-        cursor.execute("""
-            SELECT a.*, 
-                   COUNT(lt.id) as tracking_count
-            FROM activities a
-            LEFT JOIN location_tracking lt ON a.id = lt.activity_id
-            WHERE a.employee_email = %s AND a.date = %s
-            GROUP BY a.id
-            ORDER BY a.start_time DESC
-        """, (emp_email, date))
+        cursor.execute(_SQL_EMPLOYEE_TRACKING_SUMMARY, (emp_email, date))
         
         activities = cursor.fetchall()
         
-        # Convert datetime
-        for activity in activities:
-            for key, value in activity.items():
-                if isinstance(value, datetime):
-                    activity[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-        
         total_tracking_points = sum([a.get('tracking_count', 0) for a in activities])
         
         return ({
@@ -258,7 +586,41 @@ def get_employee_tracking_summary(emp_email, date=None):
         
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
+
+
+def _parse_point(location):
+    """(lat, lon) floats from a "lat, lon" string, or None when malformed"""
+    coords = location.split(', ') if location else ()
+    if len(coords) != 2:
+        return None
+    try:
+        return float(coords[0]), float(coords[1])
+    except ValueError:
+        return None
+
+
+def _path_distance_km(points):
+    """
+    Total Haversine distance (km) along (lat, lon) degree pairs.
+
+    Missing points (None or NULL coordinates) are dropped up front, then each
+    segment reuses the previous point's radians/cosine so every point is
+    converted only once.
+    """
+    converted = []
+    for point in points:
+        if point is None or point[0] is None or point[1] is None:
+            continue
+        lat, lon = radians(point[0]), radians(point[1])
+        converted.append((lat, lon, cos(lat)))
+
+    total = 0.0
+    for (lat1, lon1, cos1), (lat2, lon2, cos2) in zip(converted, converted[1:]):
+        a = sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * sin((lon2 - lon1) / 2) ** 2
+        total += 2 * atan2(sqrt(a), sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * total
 
 
 def calculate_distance_traveled(activity_id):
@@ -266,22 +628,6 @@ def calculate_distance_traveled(activity_id):
     Calculate approximate distance traveled during an activity
     Uses Haversine formula for distance between GPS points
     """
-    from math import radians, sin, cos, sqrt, atan2
-    
-    def haversine(lat1, lon1, lat2, lon2):
-        """Calculate distance between two GPS points in kilometers"""
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1, lon1, lat2, lon2 = map(radians, [float(lat1), float(lon1), float(lat2), float(lon2)])
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        
-        return R * c
-    
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -296,16 +642,28 @@ def calculate_distance_traveled(activity_id):
         if not activity or not activity.get('start_location'):
             return ({"success": False, "message": "Activity not found"}, 404)
         
-        # Get all tracking points
-        cursor.execute("""
-            SELECT location FROM location_tracking
-            WHERE activity_id = %s
-            ORDER BY tracked_at ASC
-        """, (activity_id,))
-        
-        points = cursor.fetchall()
+        start = _parse_point(activity['start_location']) or (None, None)
+        
+        # Sum the route in the database; fall back to fetching the points
+        # and summing here if the aggregate fails (e.g. out-of-range data)
+        try:
+            cursor.execute(_SQL_ROUTE_DISTANCE, (start[0], start[1], activity_id))
+            result = cursor.fetchone()
+            tracking_points = result['tracking_points']
+            total_distance = float(result['distance_km'])
+        except psycopg2.Error as e:
+            conn.rollback()
+            logger.warning("SQL route distance failed for activity %s, using Python path: %s", activity_id, e)
+            cursor.execute("""
+                SELECT latitude, longitude FROM location_tracking
+                WHERE activity_id = %s
+                ORDER BY tracked_at ASC
+            """, (activity_id,))
+            route = [(p['latitude'], p['longitude']) for p in cursor.fetchall()]
+            tracking_points = len(route)
+            total_distance = _path_distance_km([start] + route)
         
-        if not points:
+        if not tracking_points:
             return ({
                 "success": True,
                 "data": {
@@ -315,32 +673,16 @@ def calculate_distance_traveled(activity_id):
                 }
             }, 200)
         
-        # Build complete route
-        route = [activity['start_location']] + [p['location'] for p in points]
-        
-        # Calculate total distance
-        total_distance = 0
-        for i in range(len(route) - 1):
-            coords1 = route[i].split(', ')
-            coords2 = route[i+1].split(', ')
-            
-            if len(coords1) == 2 and len(coords2) == 2:
-                try:
-                    distance = haversine(coords1[0], coords1[1], coords2[0], coords2[1])
-                    total_distance += distance
-                except:
-                    pass
-        
         return ({
             "success": True,
             "data": {
                 "distance_km": round(total_distance, 2),
                 "distance_miles": round(total_distance * 0.621371, 2),
-                "tracking_points": len(points),
-                "route_segments": len(route) - 1
+                "tracking_points": tracking_points,
+                "route_segments": tracking_points
             }
         }, 200)
         
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        return_connection(conn)
\ No newline at end of file
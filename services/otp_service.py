@@ -6,11 +6,46 @@ OTP generation, validation, and management
 import secrets
 from datetime import datetime, timedelta
 from config import Config
-from database.connection import get_db_connection
+from database.connection import get_db_connection, return_connection
+from database.prepared import PreparedStatement, execute_prepared
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Invalidates the employee's previous codes and inserts the new one in a
+# single statement (the UPDATE uses idx_otp_codes_active_lookup).
+_STMT_ROTATE_OTP = PreparedStatement('rotate_otp', ('text', 'text', 'text', 'timestamp'), """
+    WITH invalidated AS (
+        UPDATE otp_codes SET used = true
+        WHERE emp_code = %s AND used = false
+    )
+    INSERT INTO otp_codes (emp_code, otp_code, expires_at)
+    VALUES (%s, %s, %s)
+    RETURNING expires_at
+""")
+
+# Counts an attempt against the employee's newest active OTP and consumes
+# it when the code matches within the attempt limit, in one statement.
+_STMT_CONSUME_OTP = PreparedStatement('consume_otp', ('text', 'text', 'int'), """
+    WITH target AS (
+        SELECT id, COALESCE(attempts, 0) AS attempts
+        FROM otp_codes
+        WHERE emp_code = %s AND used = false AND expires_at > NOW()
+        ORDER BY created_at DESC LIMIT 1
+        FOR UPDATE
+    )
+    UPDATE otp_codes o
+    SET attempts = t.attempts + 1,
+        used = (o.otp_code = %s AND t.attempts < %s)
+    FROM target t
+    WHERE o.id = t.id
+    RETURNING o.used AS verified, o.attempts
+""")
+
+# generate_otp draws one number below 10**OTP_LENGTH and zero-pads it.
+_OTP_MODULUS = 10 ** Config.OTP_LENGTH
+_OTP_FORMAT = f"{{:0{Config.OTP_LENGTH}d}}"
+
 # Play Store review dummy credentials
 PLAYSTORE_TEST_EMP_CODE = "2872"
 PLAYSTORE_TEST_OTP = "654321"
@@ -22,7 +57,7 @@ def is_playstore_test_emp(emp_code: str) -> bool:
 
 def generate_otp() -> str:
     """Generate random OTP code"""
-    return ''.join([str(secrets.randbelow(10)) for _ in range(Config.OTP_LENGTH)])
+    return _OTP_FORMAT.format(secrets.randbelow(_OTP_MODULUS))
 
 
 def save_otp(emp_code: str, otp: str) -> datetime:
@@ -33,23 +68,15 @@ def save_otp(emp_code: str, otp: str) -> datetime:
     cursor = conn.cursor()
     
     try:
-        # Invalidate previous OTPs
-        cursor.execute("""
-            UPDATE otp_codes SET used = true
-            WHERE emp_code = %s AND used = false
-        """, (emp_code,))
-        
-        # Insert new OTP
-        cursor.execute("""
-            INSERT INTO otp_codes (emp_code, otp_code, expires_at)
-            VALUES (%s, %s, %s)
-        """, (emp_code, otp, expires_at))
+        # Invalidate previous OTPs and insert the new one
+        execute_prepared(cursor, _STMT_ROTATE_OTP, (emp_code, emp_code, otp, expires_at))
         
+        expires_at = cursor.fetchone()['expires_at']
         conn.commit()
         return expires_at
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
 
 
 def verify_otp(emp_code: str, otp: str) -> bool:
@@ -61,35 +88,25 @@ def verify_otp(emp_code: str, otp: str) -> bool:
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT * FROM otp_codes
-            WHERE emp_code = %s AND otp_code = %s 
-            AND used = false AND expires_at > NOW()
-            ORDER BY created_at DESC LIMIT 1
-        """, (emp_code, otp))
+        execute_prepared(cursor, _STMT_CONSUME_OTP, (emp_code, str(otp), Config.OTP_MAX_ATTEMPTS))
         
-        otp_record = cursor.fetchone()
+        result = cursor.fetchone()
+        conn.commit()
         
-        if not otp_record:
+        if not result:
             return False
         
-        # Check attempts if column exists, otherwise skip check
-        if 'attempts' in otp_record and otp_record['attempts'] >= Config.OTP_MAX_ATTEMPTS:
-            logger.warning(f"Max OTP attempts reached for {emp_code}")
+        if not result['verified']:
+            if result['attempts'] > Config.OTP_MAX_ATTEMPTS:
+                logger.warning("Max OTP attempts reached for %s", emp_code)
             return False
         
-        # Mark as used
-        cursor.execute("""
-            UPDATE otp_codes SET used = true
-            WHERE id = %s
-        """, (otp_record['id'],))
-        
-        conn.commit()
-        logger.info(f"OTP verified successfully for {emp_code}")
+        logger.info("OTP verified successfully for %s", emp_code)
         return True
     except Exception as e:
-        logger.error(f"OTP verification error: {e}")
+        conn.rollback()
+        logger.error("OTP verification error: %s", e)
         return False
     finally:
         cursor.close()
-        conn.close()
+        return_connection(conn)
@@ -1,128 +1,499 @@
+import atexit
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
 from config import Config
 import logging
 
+try:
+    import orjson
+except ImportError:  # optional: payloads are then encoded by requests' json=
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# One keep-alive session per process so repeat sends to graph.facebook.com
+# skip DNS/TCP/TLS setup. Every send goes to that one host, so a single
+# host pool sized for the concurrent senders is all that is kept. Retries
+# happen in _post(), not in the adapter.
+_GRAPH_API_ORIGIN = "https://graph.facebook.com"
+
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=getattr(Config, 'WHATSAPP_HTTP_POOL_SIZE', 50),
+))
+
+# Proxy and CA bundle settings are read from the environment once, here.
+# With trust_env off, requests no longer re-resolves them (or reads
+# ~/.netrc) on every send.
+_SESSION.trust_env = False
+_SESSION.proxies.update(requests.utils.get_environ_proxies(_GRAPH_API_ORIGIN))
+_SESSION.verify = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or True
+
+
+# Background sender so request threads do not wait on the Graph API.
+_SEND_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='whatsapp-send')
+atexit.register(_SEND_EXECUTOR.shutdown, wait=False)
+
+
+def _is_configured() -> bool:
+    return bool(getattr(Config, "WHATSAPP_TOKEN", "") and getattr(Config, "PHONE_NUMBER_ID", ""))
+
+
+# Whether sends go to the Graph API (False = DEV MODE, log only). Config does
+# not change at runtime, so this is read once; call refresh_config() after
+# changing the WhatsApp credentials in-process.
+_WHATSAPP_ENABLED = _is_configured()
+
+
+def refresh_config() -> None:
+    """Re-read the WhatsApp credentials from Config"""
+    global _WHATSAPP_ENABLED
+    _WHATSAPP_ENABLED = _is_configured()
+
+
+# Whether the OTP template takes a URL button. Starts from config and is
+# turned off for the rest of the process once a send only succeeds without
+# the button, so later sends skip the failing first attempt.
+_HAS_BUTTON = getattr(Config, 'WHATSAPP_TEMPLATE_HAS_BUTTON', True)
+
+# Deletes whitespace, "+" and "-" in one str.translate pass.
+_PHONE_STRIP = str.maketrans("", "", " \t\n\r\f\v+-")
+
+# Error bodies are only scanned and logged up to this many bytes.
+_ERROR_BODY_BYTES = 4096
+_BUTTON_ERROR = re.compile(rb"button", re.IGNORECASE)
+
+
+class _ErrorBody:
+    """Log argument that decodes a truncated response body only if the record is emitted."""
+
+    __slots__ = ("response",)
+
+    def __init__(self, response: requests.Response):
+        self.response = response
+
+    def __str__(self) -> str:
+        return self.response.content[:_ERROR_BODY_BYTES].decode("utf-8", "replace")
+
+
+@lru_cache(maxsize=4)
+def _messages_url(phone_number_id: str) -> str:
+    return f"{_GRAPH_API_ORIGIN}/v19.0/{phone_number_id}/messages"
+
+
+# The cached headers are shared by every send, so they are handed out
+# read-only.
+@lru_cache(maxsize=4)
+def _auth_headers(token: str) -> Mapping[str, str]:
+    return MappingProxyType({
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    })
+
+
+# Consecutive upstream failures (5xx, timeouts, connection errors) before a
+# phone number id's breaker opens, and how long it stays open before one
+# probe send is let through.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+
+# Transient responses retried by _post() with exponential backoff and full
+# jitter (or the server's Retry-After). Connection failures are retried
+# too; read timeouts are not, since the message may already have gone out.
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 0.5
+RETRY_CAP_SECONDS = 8.0
+
+# Leave notifications are sent inline from request handlers, so one send,
+# retries and backoff included, gives up after SEND_DEADLINE_SECONDS (below
+# the 15s a single attempt used to be allowed). Each attempt's timeout is
+# what is left of it, and a retry is only started if at least
+# RETRY_MIN_ATTEMPT_SECONDS would remain.
+SEND_DEADLINE_SECONDS = 10.0
+RETRY_MIN_ATTEMPT_SECONDS = 2.0
+
+
+class SendRejectedError(requests.exceptions.RequestException):
+    """Raised when a send is refused locally, without reaching the Graph API."""
+
+
+class CircuitOpenError(SendRejectedError):
+    """Raised instead of sending while the Graph API breaker is open."""
+
+
+class BulkheadFullError(SendRejectedError):
+    """Raised when every concurrent send slot stayed busy for BULKHEAD_WAIT_SECONDS."""
+
+
+class _CircuitBreaker:
+    """CLOSED -> OPEN after repeated failures -> HALF_OPEN (one probe) -> CLOSED."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failure_count = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failure_count += 1
+            if self.state == "half_open" or self.failure_count >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("WhatsApp circuit opened after %s failures", self.failure_count)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class _TokenBucket:
+    """Client-side send rate cap: refills rate tokens/second up to capacity."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = max(0.0, now - self.updated)
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by every Graph API request (retries included) so bursts stay under
+# Meta's per-number throughput instead of being answered with 429s.
+_SEND_BUCKET = _TokenBucket(
+    getattr(Config, 'WHATSAPP_RATE_LIMIT_PER_SEC', 50),
+    getattr(Config, 'WHATSAPP_RATE_LIMIT_BURST', 100),
+)
+
+# Bulkhead: at most this many sends talk to the Graph API at once, so a
+# slow upstream ties up a bounded number of threads. Callers wait up to
+# BULKHEAD_WAIT_SECONDS for a slot, then take the fallback path.
+BULKHEAD_WAIT_SECONDS = 1.0
+_BULKHEAD = threading.BoundedSemaphore(getattr(Config, 'WHATSAPP_MAX_CONCURRENT_SENDS', 20))
+
+_BREAKERS: Dict[str, _CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def _breaker(phone_number_id: str) -> _CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(phone_number_id)
+        if breaker is None:
+            breaker = _BREAKERS[phone_number_id] = _CircuitBreaker(
+                BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+            )
+        return breaker
+
+
+def _retry_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(RETRY_CAP_SECONDS, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def _post(payload: dict) -> requests.Response:
+    """POST a message payload to the Graph API through the bulkhead and breaker."""
+    if not _BULKHEAD.acquire(timeout=BULKHEAD_WAIT_SECONDS):
+        raise BulkheadFullError("WhatsApp send slots exhausted")
+    try:
+        return _post_with_retries(payload)
+    finally:
+        _BULKHEAD.release()
+
+
+def _post_with_retries(payload: dict) -> requests.Response:
+    # Encoded once for every attempt; _auth_headers() already sets the
+    # JSON Content-Type that requests would otherwise add for json=. This
+    # happens before allow() so an unencodable payload cannot take the
+    # half-open probe and leave its outcome unrecorded.
+    body = {"data": orjson.dumps(payload)} if orjson is not None else {"json": payload}
+
+    breaker = _breaker(Config.PHONE_NUMBER_ID)
+    if not breaker.allow():
+        raise CircuitOpenError("WhatsApp API circuit open")
+
+    deadline = time.monotonic() + SEND_DEADLINE_SECONDS
+
+    def retry_fits(attempt: int, delay: float) -> bool:
+        return (
+            attempt + 1 < RETRY_MAX_ATTEMPTS
+            and time.monotonic() + delay + RETRY_MIN_ATTEMPT_SECONDS <= deadline
+        )
+
+    for attempt in range(RETRY_MAX_ATTEMPTS):
+        _SEND_BUCKET.acquire()
+        try:
+            response = _SESSION.post(
+                _messages_url(Config.PHONE_NUMBER_ID),
+                headers=_auth_headers(Config.WHATSAPP_TOKEN),
+                timeout=max(RETRY_MIN_ATTEMPT_SECONDS, deadline - time.monotonic()),
+                **body,
+            )
+        except requests.exceptions.ConnectionError as e:
+            delay = _retry_delay(attempt)
+            if not retry_fits(attempt, delay):
+                breaker.record_failure()
+                raise
+            logger.debug("WhatsApp connection error, retrying in %.2fs: %s", delay, e)
+            time.sleep(delay)
+            continue
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        if response.status_code in RETRY_STATUSES:
+            delay = _retry_delay(attempt, response)
+            if retry_fits(attempt, delay):
+                logger.debug("WhatsApp API status %s, retrying in %.2fs", response.status_code, delay)
+                time.sleep(delay)
+                continue
+        break
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+# Static payload pieces shared by every message. They are only read (by the
+# JSON encoder), never mutated, so one instance serves all sends.
+_LANGUAGE_EN_US = {"code": "en_US"}
+
+
+def _template_payload(to: str, name: str, components: list) -> dict:
+    return {
+        "messaging_product": "whatsapp",
+        "to": to,
+        "type": "template",
+        "template": {"name": name, "language": _LANGUAGE_EN_US, "components": components},
+    }
+
+
+def _text_parameters(values) -> list:
+    """Template text parameters for values, in order. Built fresh per send:
+    concurrent sends would race on shared, patched-in-place dicts."""
+    return [{"type": "text", "text": str(value)} for value in values]
+
+
+def _text_payload(to: str, body: str) -> dict:
+    return {"messaging_product": "whatsapp", "to": to, "type": "text", "text": {"body": body}}
+
+
+def _send_template(to: str, template_name: str, components: list) -> requests.Response:
+    """Send a template message to an already formatted number."""
+    return _post(_template_payload(to, template_name, components))
+
+
+def _send_text(to: str, body: str) -> requests.Response:
+    """Send a plain text message to an already formatted number."""
+    return _post(_text_payload(to, body))
+
+
+def _send_template_or_text(
+    kind: str,
+    to: str,
+    template_name: str,
+    components: Optional[list],
+    fallback_text: Callable[[], str],
+) -> bool:
+    """
+    Send a template message, falling back to plain text if it is rejected.
+
+    With components=None only the text is sent. fallback_text() is called
+    only when the text message is needed; kind labels the log lines.
+    """
+    template_status = template_error = None
+    if components is not None:
+        response = _send_template(to, template_name, components)
+        if response.status_code == 200:
+            logger.info("WhatsApp %s template sent | to=%s", kind, to)
+            return True
+
+        template_status, template_error = response.status_code, _ErrorBody(response)
+        logger.warning(
+            "WhatsApp %s template failed (status=%s): %s — falling back to text.",
+            kind, template_status, template_error
+        )
+
+    text_response = _send_text(to, fallback_text())
+    if text_response.status_code == 200:
+        logger.info("WhatsApp %s text sent (fallback) | to=%s", kind, to)
+        return True
+
+    logger.error(
+        "All WhatsApp %s sends failed | template_status=%s text_status=%s "
+        "template_response=%s text_response=%s",
+        kind, template_status, text_response.status_code,
+        template_error, _ErrorBody(text_response)
+    )
+    return False
+
+
 def send_otp(phone_number: str, otp: str, emp_name: str) -> bool:
     """Send OTP via WhatsApp Business API"""
+    global _HAS_BUTTON
+
     try:
-        if not Config.WHATSAPP_TOKEN or not Config.PHONE_NUMBER_ID or \
-           Config.WHATSAPP_TOKEN == "" or Config.PHONE_NUMBER_ID == "":
-            logger.info(f"DEV MODE - OTP for {emp_name} ({phone_number}): {otp}")
+        if not _WHATSAPP_ENABLED:
+            logger.info("DEV MODE - OTP for %s (%s): %s", emp_name, phone_number, otp)
             return True
 
-        logger.info(f"Sending OTP via WhatsApp to {phone_number}")
-
-        url = f"https://graph.facebook.com/v19.0/{Config.PHONE_NUMBER_ID}/messages"
-        headers = {
-            "Authorization": f"Bearer {Config.WHATSAPP_TOKEN}",
-            "Content-Type": "application/json"
-        }
+        logger.debug("Sending OTP via WhatsApp to %s", phone_number)
 
-        formatted_phone = phone_number.replace("+", "").replace("-", "").replace(" ", "").strip()
-        if not formatted_phone.startswith("91") and len(formatted_phone) == 10:
-            formatted_phone = "91" + formatted_phone
+        formatted_phone = _format_phone(phone_number)
 
+        # The body and the URL button carry the same parameter list
+        otp_parameters = _text_parameters((otp,))
         components = [
             {
                 "type": "body",
-                "parameters": [{"type": "text", "text": otp}]
+                "parameters": otp_parameters
             }
         ]
 
-        has_button = getattr(Config, 'WHATSAPP_TEMPLATE_HAS_BUTTON', True)
+        has_button = _HAS_BUTTON
         if has_button:
             components.append({
                 "type": "button",
                 "sub_type": "url",
                 "index": "0",
-                "parameters": [{"type": "text", "text": otp}]
+                "parameters": otp_parameters
             })
 
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": formatted_phone,
-            "type": "template",
-            "template": {
-                "name": Config.WHATSAPP_TEMPLATE_NAME,
-                "language": {"code": "en_US"},
-                "components": components
-            }
-        }
-
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
+        response = _send_template(formatted_phone, Config.WHATSAPP_TEMPLATE_NAME, components)
 
         if response.status_code == 200:
-            logger.info(f"WhatsApp OTP sent successfully to {phone_number}")
+            logger.debug("WhatsApp OTP sent successfully to %s", phone_number)
             return True
         else:
-            logger.error(f"WhatsApp API error - Status: {response.status_code}, Response: {response.text}")
-
-            if response.status_code == 400 and has_button and "button" in response.text.lower():
-                logger.info("Retrying without button component...")
-                payload["template"]["components"] = [components[0]]
-                retry_response = requests.post(url, headers=headers, json=payload, timeout=15)
+            # The button check searches the raw bytes in place; the body is
+            # decoded (truncated) only if the log record is emitted.
+            logger.error("WhatsApp API error - Status: %s, Response: %s", response.status_code, _ErrorBody(response))
+
+            if (
+                response.status_code == 400
+                and has_button
+                and _BUTTON_ERROR.search(response.content, 0, _ERROR_BODY_BYTES)
+            ):
+                logger.debug("Retrying without button component...")
+                retry_response = _send_template(formatted_phone, Config.WHATSAPP_TEMPLATE_NAME, components[:1])
                 if retry_response.status_code == 200:
-                    logger.info("WhatsApp OTP sent successfully (without button)")
+                    _HAS_BUTTON = False
+                    logger.info("WhatsApp OTP sent successfully (without button); button disabled for later sends")
                     return True
-                logger.error(f"Retry failed - Status: {retry_response.status_code}, Response: {retry_response.text}")
+                logger.error("Retry failed - Status: %s, Response: %s", retry_response.status_code, _ErrorBody(retry_response))
 
-            logger.info(f"FALLBACK - OTP for {emp_name}: {otp}")
+            logger.info("FALLBACK - OTP for %s: %s", emp_name, otp)
             return False
 
+    except SendRejectedError as e:
+        logger.warning("WhatsApp OTP not sent: %s", e)
+        logger.info("FALLBACK - OTP for %s: %s", emp_name, otp)
+        return False
     except requests.exceptions.Timeout:
-        logger.error("WhatsApp API timeout after 15 seconds")
-        logger.info(f"FALLBACK - OTP for {emp_name}: {otp}")
+        logger.error("WhatsApp API timeout after %ss", SEND_DEADLINE_SECONDS)
+        logger.info("FALLBACK - OTP for %s: %s", emp_name, otp)
         return False
     except Exception as e:
-        logger.error(f"WhatsApp error: {e}")
-        logger.info(f"FALLBACK - OTP for {emp_name}: {otp}")
+        logger.error("WhatsApp error: %s", e)
+        logger.info("FALLBACK - OTP for %s: %s", emp_name, otp)
         return False
 
 
+def send_otp_async(phone_number: str, otp: str, emp_name: str) -> Optional[Future]:
+    """
+    Queue an OTP send on the background sender and return its Future.
+
+    In dev mode (WhatsApp not configured) the OTP is logged inline and None
+    is returned, so no worker thread is used.
+    """
+    if not _WHATSAPP_ENABLED:
+        logger.info("DEV MODE - OTP for %s (%s): %s", emp_name, phone_number, otp)
+        return None
+
+    return _SEND_EXECUTOR.submit(send_otp, phone_number, otp, emp_name)
+
+
 def send_notification(phone_number: str, message: str, template_name: str = None) -> bool:
     """Send a plain text notification via WhatsApp."""
     try:
-        if not Config.WHATSAPP_TOKEN or not Config.PHONE_NUMBER_ID:
-            logger.info(f"DEV MODE - Notification to {phone_number}: {message}")
+        if not _WHATSAPP_ENABLED:
+            logger.info("DEV MODE - Notification to %s: %s", phone_number, message)
             return True
 
-        url = f"https://graph.facebook.com/v19.0/{Config.PHONE_NUMBER_ID}/messages"
-        headers = {
-            "Authorization": f"Bearer {Config.WHATSAPP_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        formatted_phone = phone_number.replace("+", "").replace("-", "").replace(" ", "").strip()
-        if not formatted_phone.startswith("91") and len(formatted_phone) == 10:
-            formatted_phone = "91" + formatted_phone
-
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": formatted_phone,
-            "type": "text",
-            "text": {"body": message}
-        }
-
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
+        response = _send_text(_format_phone(phone_number), message)
 
         if response.status_code == 200:
-            logger.info(f"WhatsApp notification sent to {phone_number}")
+            logger.debug("WhatsApp notification sent to %s", phone_number)
             return True
         else:
-            logger.error(f"WhatsApp notification failed - Status: {response.status_code}")
+            logger.error("WhatsApp notification failed - Status: %s", response.status_code)
             return False
 
+    except SendRejectedError as e:
+        logger.warning("WhatsApp notification to %s not sent: %s", phone_number, e)
+        return False
     except Exception as e:
-        logger.error(f"WhatsApp notification error: {e}")
+        logger.error("WhatsApp notification error: %s", e)
         return False
 
 
+@lru_cache(maxsize=4096)
 def _format_phone(phone: str) -> str:
-    phone = phone.replace("+", "").replace("-", "").replace(" ", "").strip()
+    """Strip separators and "+"; prefix 91 to every 10-digit (local) number.
+
+    Shared by all senders. Already formatted numbers skip the translate.
+    """
+    if len(phone) == 12 and phone.startswith("91") and phone.isdigit():
+        return phone
+    phone = phone.translate(_PHONE_STRIP)
     if len(phone) == 10:
-        phone = "91" + phone
+        return "91" + phone
     return phone
 
 
@@ -137,6 +508,16 @@ def _format_days(number_of_days) -> str:
         return str(number_of_days).strip()
 
 
+def _leave_message_text(v1, v2, v3, v4, v5, v6) -> str:
+    """Human-readable leave message, only built for the plain-text fallback."""
+    return (
+        f"Hi {v1},\n"
+        f"{v2} from {v3} to {v4} ({v5} days).\n"
+        f"Reason: {v6}\n"
+        f"This is an automated message. Please Do not Reply here"
+    )
+
+
 def send_leave_notification(
     phone_number: str,
     title: str,
@@ -183,6 +564,14 @@ def send_leave_notification(
         {{5}} = number of days
         {{6}} = "-"
     """
+    # ── DEV MODE: nothing is formatted or built ───────────────────────────
+    if not _WHATSAPP_ENABLED:
+        logger.info(
+            "DEV MODE WHATSAPP | type=%s | to=%s (%s) | %s | %s | %s -> %s",
+            notification_type, employee_name, phone_number, title, message, from_date, to_date
+        )
+        return True
+
     try:
         formatted_phone = _format_phone(phone_number)
         day_count = _format_days(number_of_days)
@@ -216,97 +605,64 @@ def send_leave_notification(
             v5 = day_count
             v6 = "-"
 
-        # Human-readable version (used as plain-text fallback)
-        full_message = (
-            f"Hi {v1},\n"
-            f"{v2} from {v3} to {v4} ({v5} days).\n"
-            f"Reason: {v6}\n"
-            f"This is an automated message. Please Do not Reply here"
+        # ── PRODUCTION ────────────────────────────────────────────────────
+        return _send_template_or_text(
+            f"leave {notification_type}",
+            formatted_phone,
+            template_name,
+            [
+                {"type": "header", "parameters": _text_parameters((title,))},
+                {"type": "body", "parameters": _text_parameters((v1, v2, v3, v4, v5, v6))},
+            ],
+            lambda: _leave_message_text(v1, v2, v3, v4, v5, v6),
         )
 
-        # ── DEV MODE ──────────────────────────────────────────────────────
-        if not Config.WHATSAPP_TOKEN or not Config.PHONE_NUMBER_ID:
-            logger.info(
-                "DEV MODE WHATSAPP | type=%s | to=%s (%s)\n%s",
-                notification_type, employee_name, phone_number, full_message
-            )
-            return True
+    except SendRejectedError as e:
+        logger.warning("WhatsApp leave notification to %s not sent: %s", phone_number, e)
+        return False
+    except Exception:
+        logger.exception("WhatsApp send_leave_notification failed")
+        return False
 
-        # ── PRODUCTION ────────────────────────────────────────────────────
-        url = f"https://graph.facebook.com/v19.0/{Config.PHONE_NUMBER_ID}/messages"
-        headers = {
-            "Authorization": f"Bearer {Config.WHATSAPP_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        template_payload = {
-            "messaging_product": "whatsapp",
-            "to": formatted_phone,
-            "type": "template",
-            "template": {
-                "name": template_name,
-                "language": {"code": "en_US"},
-                "components": [
-                    {
-                        "type": "header",
-                        "parameters": [
-                            {"type": "text", "text": str(title)}
-                        ]
-                    },
-                    {
-                        "type": "body",
-                        "parameters": [
-                            {"type": "text", "text": str(v1)},
-                            {"type": "text", "text": str(v2)},
-                            {"type": "text", "text": str(v3)},
-                            {"type": "text", "text": str(v4)},
-                            {"type": "text", "text": str(v5)},
-                            {"type": "text", "text": str(v6)},
-                        ]
-                    }
-                ]
-            }
-        }
 
-        response = requests.post(url, headers=headers, json=template_payload, timeout=15)
-        if response.status_code == 200:
-            logger.info(
-                "WhatsApp leave template sent | type=%s | to=%s",
-                notification_type, formatted_phone
-            )
-            return True
+def send_leave_notifications_bulk(notifications: List[dict]) -> List[bool]:
+    """
+    Send several leave notifications concurrently on the background sender.
 
-        logger.warning(
-            "WhatsApp template failed (status=%s): %s — falling back to text.",
-            response.status_code, response.text
-        )
+    Each item holds send_leave_notification keyword arguments; the results
+    come back in the same order. Concurrency is bounded by the sender pool.
+    """
+    if len(notifications) < 2 or not _WHATSAPP_ENABLED:
+        return [send_leave_notification(**kwargs) for kwargs in notifications]
 
-        # Fallback: plain text message
-        text_payload = {
-            "messaging_product": "whatsapp",
-            "to": formatted_phone,
-            "type": "text",
-            "text": {"body": full_message}
-        }
-        text_response = requests.post(url, headers=headers, json=text_payload, timeout=15)
-        if text_response.status_code == 200:
-            logger.info(
-                "WhatsApp leave text sent (fallback) | type=%s | to=%s",
-                notification_type, formatted_phone
-            )
-            return True
+    futures = [_SEND_EXECUTOR.submit(send_leave_notification, **kwargs) for kwargs in notifications]
+    return [future.result() for future in futures]
 
-        logger.error(
-            "All WhatsApp send attempts failed | template_status=%s text_status=%s "
-            "template_response=%s text_response=%s",
-            response.status_code, text_response.status_code,
-            response.text, text_response.text
-        )
-        return False
 
-    except Exception:
-        logger.exception("WhatsApp send_leave_notification failed")
-        return False
+def broadcast(recipients: List[str], build_payload: Callable[[str], dict]) -> List[bool]:
+    """
+    Send one message per recipient phone number concurrently.
+
+    build_payload(recipient) returns the message body (type, template/text);
+    the formatted "to" number is filled in here. Sends run on the background
+    sender and share the session's keep-alive connections, and go through
+    the same breaker and retries as single sends. Results are in recipient
+    order.
+    """
+    if not _WHATSAPP_ENABLED:
+        logger.info("DEV MODE - broadcast to %s recipients not sent", len(recipients))
+        return [True] * len(recipients)
+
+    def send_one(recipient: str) -> bool:
+        try:
+            payload = {**build_payload(recipient), "to": _format_phone(recipient)}
+            payload.setdefault("messaging_product", "whatsapp")
+            return _post(payload).status_code == 200
+        except Exception as e:
+            logger.warning("WhatsApp broadcast to %s failed: %s", recipient, e)
+            return False
+
+    return list(_SEND_EXECUTOR.map(send_one, recipients))
 
 
 def send_exception_notification(
@@ -319,78 +675,29 @@ def send_exception_notification(
     Send WhatsApp notification for attendance exceptions (late arrival / early leave).
     Falls back to plain text if template fails or WhatsApp is not configured.
     """
+    if not _WHATSAPP_ENABLED:
+        logger.info("DEV MODE WHATSAPP | exception to=%s\n%s", phone_number, message_body)
+        return True
+
     try:
         formatted_phone = _format_phone(phone_number)
         template_name = getattr(Config, "WHATSAPP_EXCEPTION_TEMPLATE", "fawnix_notification")
 
-        full_message = (message_body or "").strip()
         template_parameters = list(template_parameters or [])
+        components = (
+            [{"type": "body", "parameters": _text_parameters(template_parameters)}]
+            if template_parameters else None
+        )
 
-        if not Config.WHATSAPP_TOKEN or not Config.PHONE_NUMBER_ID:
-            logger.info(
-                "DEV MODE WHATSAPP | exception to=%s\n%s",
-                phone_number,
-                full_message
-            )
-            return True
-
-        url = f"https://graph.facebook.com/v19.0/{Config.PHONE_NUMBER_ID}/messages"
-        headers = {
-            "Authorization": f"Bearer {Config.WHATSAPP_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        response = None
-        if template_parameters:
-            components = [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {"type": "text", "text": str(value)}
-                        for value in template_parameters
-                    ]
-                }
-            ]
-            template_payload = {
-                "messaging_product": "whatsapp",
-                "to": formatted_phone,
-                "type": "template",
-                "template": {
-                    "name": template_name,
-                    "language": {"code": "en_US"},
-                    "components": components
-                }
-            }
-
-            response = requests.post(url, headers=headers, json=template_payload, timeout=15)
-            if response.status_code == 200:
-                logger.info("WhatsApp exception template sent | to=%s", formatted_phone)
-                return True
-
-            logger.warning(
-                "WhatsApp exception template failed (status=%s): %s — falling back to text.",
-                response.status_code, response.text
-            )
-
-        text_payload = {
-            "messaging_product": "whatsapp",
-            "to": formatted_phone,
-            "type": "text",
-            "text": {"body": full_message}
-        }
-        text_response = requests.post(url, headers=headers, json=text_payload, timeout=15)
-        if text_response.status_code == 200:
-            logger.info("WhatsApp exception text sent (fallback) | to=%s", formatted_phone)
-            return True
-
-        logger.error(
-            "All WhatsApp exception sends failed | template_status=%s text_status=%s "
-            "template_response=%s text_response=%s",
-            response.status_code if response is not None else None,
-            text_response.status_code,
-            response.text if response is not None else None,
-            text_response.text
+        return _send_template_or_text(
+            "exception",
+            formatted_phone,
+            template_name,
+            components,
+            lambda: (message_body or "").strip(),
         )
+    except SendRejectedError as e:
+        logger.warning("WhatsApp exception notification to %s not sent: %s", phone_number, e)
         return False
     except Exception:
         logger.exception("WhatsApp send_exception_notification failed")
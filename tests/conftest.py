@@ -0,0 +1,57 @@
+import json as json_lib
+
+import pytest
+import requests
+
+import services.whatsapp_service as whatsapp_service
+
+
+def whatsapp_response(status_code=200, body=b"ok", headers=None):
+    """A real requests.Response, so .text/.content/.headers behave as in production."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body if isinstance(body, bytes) else body.encode()
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeWhatsAppSession:
+    """
+    Stands in for whatsapp_service._SESSION and records every POST.
+
+    respond(payload) decides each outcome: a status code, a
+    (status, body[, headers]) tuple, or an exception to raise.
+    """
+
+    def __init__(self):
+        self.bodies = []
+        self.payloads = []
+        self.sleeps = []
+        self.respond = lambda payload: 200
+
+    def post(self, url, headers=None, json=None, data=None, timeout=None):
+        # _post() passes orjson bytes as data=, or the dict as json= without it
+        self.bodies.append(data if data is not None else json)
+        payload = json if data is None else json_lib.loads(data)
+        self.payloads.append(payload)
+
+        outcome = self.respond(payload)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if isinstance(outcome, int):
+            outcome = (outcome,)
+        return whatsapp_response(*outcome)
+
+
+@pytest.fixture
+def whatsapp_session(monkeypatch):
+    """Configured WhatsApp sender talking to a FakeWhatsAppSession, with fresh breakers and no backoff sleeps."""
+    monkeypatch.setattr(whatsapp_service.Config, "WHATSAPP_TOKEN", "token")
+    monkeypatch.setattr(whatsapp_service.Config, "PHONE_NUMBER_ID", "12345")
+    monkeypatch.setattr(whatsapp_service, "_WHATSAPP_ENABLED", True)
+    monkeypatch.setattr(whatsapp_service, "_BREAKERS", {})
+
+    session = FakeWhatsAppSession()
+    monkeypatch.setattr(whatsapp_service, "_SESSION", session)
+    monkeypatch.setattr(whatsapp_service.time, "sleep", session.sleeps.append)
+    return session
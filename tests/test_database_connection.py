@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+import database.connection as db_connection
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.idle = [conn]
+
+    def getconn(self):
+        return self.idle.pop()
+
+    def putconn(self, conn):
+        self.idle.append(conn)
+
+
+def test_returned_autocommit_connection_is_reset_for_the_next_borrower(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(db_connection, "connection_pool", FakePool(conn))
+    monkeypatch.setattr(db_connection, "_pool_pid", os.getpid())
+
+    borrowed = db_connection.get_db_connection()
+    borrowed.autocommit = True
+    db_connection.return_connection(borrowed)
+
+    again = db_connection.get_db_connection()
+    assert again is conn
+    assert again.autocommit is False
+
+
+def test_notify_listener_restarts_in_a_forked_process(monkeypatch):
+    started = []
+
+    class FakeThread:
+        def __init__(self, target=None, args=(), name=None, daemon=None):
+            pass
+
+        def start(self):
+            started.append(os.getpid())
+
+        def is_alive(self):
+            return True
+
+    monkeypatch.setattr(db_connection.threading, "Thread", FakeThread)
+    monkeypatch.setattr(db_connection, "_LISTENERS", {"holidays_changed": (FakeThread(), os.getpid() + 1)})
+
+    db_connection.start_notify_listener("holidays_changed", print, print)
+    db_connection.start_notify_listener("holidays_changed", print, print)
+
+    assert started == [os.getpid()]
+
+
+class FakeListenConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_notify_listener_closes_its_connection_and_resyncs_on_failure(monkeypatch):
+    conn = FakeListenConnection()
+    resyncs = []
+
+    def fail_select(*args):
+        assert db_connection.is_notify_subscribed("holidays_changed")
+        raise OSError("connection lost")
+
+    def stop(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(db_connection, "create_listen_connection", lambda channel: conn)
+    monkeypatch.setattr(db_connection.select, "select", fail_select)
+    monkeypatch.setattr(db_connection.time, "sleep", stop)
+    monkeypatch.setattr(db_connection, "_SUBSCRIBED", {})
+
+    with pytest.raises(KeyboardInterrupt):
+        db_connection._listen_for_notifies("holidays_changed", print, lambda: resyncs.append(1))
+
+    assert conn.closed is True
+    assert resyncs == [1, 1]
+    assert not db_connection.is_notify_subscribed("holidays_changed")
@@ -1,8 +1,32 @@
+import re
+
 import pytest
 from datetime import date
 from services import leaves_service as ls
 
+_APPROVED_ONLY = re.compile(r"status = ('approved'|%s)").search
+
+
+def _employee_row(sql):
+    # Return a valid joining date for the employee
+    return {'emp_joined_date': date(2020, 1, 1)}
+
+
+def _used_leaves_row(sql):
+    # Simulate behaviour: if the query counts only approved leaves, return 2.0 used
+    # If it were counting pending as well, it would return 3.0. Test ensures only approved counted.
+    if _APPROVED_ONLY(sql):
+        return {'casual_used': 2.0, 'sick_used': 0.0}
+    return {'casual_used': 3.0, 'sick_used': 0.0}
+
+
 class MockCursor:
+    # (matcher, row builder) pairs, compiled once; the first match sets fetchone()
+    _MATCHERS = (
+        (re.compile(r"FROM employees").search, _employee_row),
+        (re.compile(r"AS casual_used").search, _used_leaves_row),
+    )
+
     def __init__(self):
         self._next_fetchone = None
         self._next_fetchall = None
@@ -10,16 +34,10 @@ class MockCursor:
 
     def execute(self, sql, params=None):
         self.queries.append((sql, params))
-        if "FROM employees" in sql:
-            # Return a valid joining date for the employee
-            self._next_fetchone = {'emp_joined_date': date(2020, 1, 1)}
-        elif "SELECT leave_type" in sql:
-            # Simulate behaviour: if the query counts only approved leaves, return 2.0 used
-            # If it were counting pending as well, it would return 3.0. Test ensures only approved counted.
-            if "status = 'approved'" in sql or "status = %s" in sql:
-                self._next_fetchall = [{'leave_type': 'casual', 'used': 2.0}]
-            else:
-                self._next_fetchall = [{'leave_type': 'casual', 'used': 3.0}]
+        for matches, build_row in self._MATCHERS:
+            if matches(sql):
+                self._next_fetchone = build_row(sql)
+                break
 
     def fetchone(self):
         return self._next_fetchone
@@ -48,3 +66,198 @@ def test_balance_counts_only_approved(monkeypatch):
     assert 'casual' in balance
     assert balance['casual']['used'] == 2.0
     assert balance['casual']['remaining'] == 12 - 2.0
+
+
+class HolidayCursor:
+    def __init__(self, holiday_dates):
+        self.holiday_dates = holiday_dates
+        self.queries = []
+
+    def execute(self, sql, params=None):
+        self.queries.append((sql, params))
+
+    def fetchall(self):
+        return [{'holiday_date': d} for d in self.holiday_dates]
+
+    def close(self):
+        pass
+
+
+def test_leave_count_uses_cached_holidays(monkeypatch):
+    cursor = HolidayCursor([date(2026, 1, 26)])
+    conn = MockConn()
+    conn.cursor_obj = cursor
+    monkeypatch.setattr(ls, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(ls, '_HOLIDAYS', {})
+    monkeypatch.setattr(ls, 'is_notify_subscribed', lambda channel: True)
+    monkeypatch.setattr(ls, 'start_holiday_cache_listener', lambda: None)
+
+    # Mon 2026-01-26 is a holiday, Tue 2026-01-27 is a working day
+    assert ls.calculate_leave_count(date(2026, 1, 26), date(2026, 1, 27), 'full_day', 2026) == 1.0
+    assert ls.calculate_leave_count(date(2026, 1, 26), date(2026, 1, 27), 'full_day', 2026) == 1.0
+    assert len(cursor.queries) == 1
+
+    cursor.holiday_dates = []
+    ls.invalidate_holiday_cache(2026)
+    assert ls.calculate_leave_count(date(2026, 1, 26), date(2026, 1, 27), 'full_day', 2026) == 2.0
+    assert len(cursor.queries) == 2
+
+
+def test_holiday_cache_expires_while_this_process_is_not_subscribed(monkeypatch):
+    cursor = HolidayCursor([date(2026, 1, 26)])
+    conn = MockConn()
+    conn.cursor_obj = cursor
+    clock = [1000.0]
+    monkeypatch.setattr(ls, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(ls, '_HOLIDAYS', {})
+    monkeypatch.setattr(ls.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(ls, 'start_holiday_cache_listener', lambda: None)
+    # No live LISTEN session in this process, e.g. a worker forked from a subscribed parent.
+    monkeypatch.setattr(ls, 'is_notify_subscribed', lambda channel: False)
+
+    ls.get_holiday_ordinals(2026)
+    clock[0] += ls.HOLIDAY_CACHE_TTL_SECONDS - 1
+    ls.get_holiday_ordinals(2026)
+    assert len(cursor.queries) == 1
+
+    clock[0] += 2
+    ls.get_holiday_ordinals(2026)
+    assert len(cursor.queries) == 2
+
+
+class SummaryCursor(MockCursor):
+    def execute(self, sql, params=None):
+        self.queries.append((sql, params))
+        self._next_fetchone = {
+            'emp_joined_date': date(2020, 1, 1),
+            'casual_used': 2.0,
+            'sick_used': 1.0,
+            'late_count': 3,
+            'short_days': 1,
+        }
+
+
+def test_leave_summary_fetches_balance_and_deductions_in_one_query(monkeypatch):
+    conn = MockConn()
+    conn.cursor_obj = SummaryCursor()
+    monkeypatch.setattr(ls, 'get_db_connection', lambda: conn)
+
+    result, status = ls.get_leave_summary('E001')
+
+    assert status == 200
+    assert len(conn.cursor_obj.queries) == 1
+    assert result['data']['balance']['casual']['used'] == 2.0
+    assert result['data']['balance']['sick']['remaining'] == 6 - 1.0
+    assert result['data']['auto_deductions']['late_arrivals'] == {'count': 3, 'deduction': 0.5}
+    assert result['data']['auto_deductions']['total_deduction'] == 1.0
+
+
+def test_fused_summary_query_shares_the_standalone_predicates():
+    for fragment, standalone in [
+        (ls._SQL_USED_LEAVE_COLUMNS, ls._SQL_BALANCE_USED),
+        (ls._SQL_DEDUCTION_COUNT_COLUMNS, ls._SQL_ATTENDANCE_DEDUCTION_COUNTS),
+    ]:
+        assert fragment in standalone
+        assert fragment in ls._SQL_BALANCE_AND_DEDUCTIONS
+
+
+class ReviewCursor(HolidayCursor):
+    def __init__(self, status):
+        super().__init__([])
+        self.status = status
+        self._next_fetchone = None
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if sql == ls._STMT_REVIEW_PENDING_LEAVE.execute_sql:
+            self._next_fetchone = {'emp_name': 'Asha'} if self.status == 'pending' else None
+        elif sql == ls._STMT_LEAVE_STATUS_BY_ID_MGR.execute_sql:
+            self._next_fetchone = {'status': self.status} if self.status else None
+
+    def fetchone(self):
+        return self._next_fetchone
+
+
+@pytest.mark.parametrize('status, expected', [
+    ('pending', 200),
+    ('approved', 400),
+    (None, 404),
+])
+def test_approve_leave_updates_pending_row_in_one_statement(monkeypatch, status, expected):
+    cursor = ReviewCursor(status)
+    conn = MockConn()
+    conn.cursor_obj = cursor
+    conn.commit = lambda: None
+    cursor.connection = conn
+    monkeypatch.setattr(ls, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(ls, 'clear_on_leave_cache', lambda: None)
+
+    body, code = ls.approve_leave(7, 'M001', 'approved')
+
+    assert code == expected
+    executed = [sql for sql, _ in cursor.queries if sql.startswith('EXECUTE')]
+    if status == 'pending':
+        assert executed == [ls._STMT_REVIEW_PENDING_LEAVE.execute_sql]
+        assert body['data']['employee'] == 'Asha'
+    else:
+        assert executed[-1] == ls._STMT_LEAVE_STATUS_BY_ID_MGR.execute_sql
+
+
+def test_on_leave_cache_expires_after_its_ttl_bucket(monkeypatch):
+    cursor = HolidayCursor([])
+    cursor.fetchone = lambda: None
+    conn = MockConn()
+    conn.cursor_obj = cursor
+    clock = [ls.ON_LEAVE_CACHE_TTL_SECONDS * 1000.0]
+    monkeypatch.setattr(ls, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(ls.time, 'time', lambda: clock[0])
+    ls.clear_on_leave_cache()
+
+    assert ls.is_employee_on_leave('E1') is False
+    clock[0] += ls.ON_LEAVE_CACHE_TTL_SECONDS - 1
+    assert ls.is_employee_on_leave('E1') is False
+    assert len(cursor.queries) == 1
+
+    # Another worker approved a leave: seen once the bucket rolls over.
+    cursor.fetchone = lambda: {'?column?': 1}
+    clock[0] += 1
+    assert ls.is_employee_on_leave('E1') is True
+    assert len(cursor.queries) == 2
+
+    ls.clear_on_leave_cache()
+
+
+def test_apply_leave_runs_no_side_lookups_for_an_unknown_employee(monkeypatch):
+    cursor = HolidayCursor([])
+    cursor.fetchone = lambda: None
+    conn = MockConn()
+    conn.cursor_obj = cursor
+    monkeypatch.setattr(ls, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(ls, 'return_connection', lambda c: None)
+
+    class NoLookups:
+        def submit(self, *args):
+            raise AssertionError("no lookup should be submitted")
+
+    monkeypatch.setattr(ls, '_LOOKUP_EXECUTOR', NoLookups())
+
+    body, status = ls.apply_leave('E404', '05-01-2026', '06-01-2026', 'casual', 'full_day')
+
+    assert status == 404
+    assert len(cursor.queries) == 1
+
+
+def test_bounded_leave_listings_skip_the_server_side_cursor(monkeypatch):
+    cursor = HolidayCursor([])
+    cursor.fetchall = lambda: [{'id': 1}]
+    names = []
+
+    class ListingConn(MockConn):
+        def cursor(self, name=None):
+            names.append(name)
+            return cursor
+
+    rows = ls._fetch_leave_rows(ListingConn(), 'SELECT 1', (), ls.LEAVES_STREAM_THRESHOLD)
+
+    assert rows == [{'id': 1}]
+    assert names == [None]
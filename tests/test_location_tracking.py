@@ -0,0 +1,310 @@
+import psycopg2
+import pytest
+
+from services import locationtracking_service as lt
+
+
+class DistanceCursor:
+    def __init__(self, sql_result=None, sql_error=None, locations=()):
+        self.sql_result = sql_result
+        self.sql_error = sql_error
+        self.locations = locations
+        self._next_fetchone = None
+        self._next_fetchall = None
+
+    def execute(self, sql, params=None):
+        if "SELECT start_location FROM activities" in sql:
+            self._next_fetchone = {'start_location': '12.9716, 77.5946'}
+        elif sql is lt._SQL_ROUTE_DISTANCE:
+            self.route_params = params
+            if self.sql_error:
+                raise self.sql_error
+            self._next_fetchone = self.sql_result
+        elif "SELECT latitude, longitude FROM location_tracking" in sql:
+            self._next_fetchall = [{'latitude': lat, 'longitude': lon} for lat, lon in self.locations]
+
+    def fetchone(self):
+        return self._next_fetchone
+
+    def fetchall(self):
+        return self._next_fetchall
+
+    def close(self):
+        pass
+
+
+class DistanceConn:
+    def __init__(self, cursor):
+        self.cursor_obj = cursor
+        self.rolled_back = False
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+
+def test_path_distance_skips_missing_points():
+    start = lt._parse_point('12.9716, 77.5946')
+    assert lt._parse_point('bad') is None
+    assert lt._parse_point('') is None
+
+    path = [start, None, (None, None), (13.0827, 80.2707)]
+    assert lt._path_distance_km(path) == pytest.approx(290.17, abs=0.01)
+    assert lt._path_distance_km(path[:1]) == 0.0
+
+
+def test_distance_uses_sql_aggregate(monkeypatch):
+    cursor = DistanceCursor(sql_result={'tracking_points': 3, 'distance_km': 4.256})
+    conn = DistanceConn(cursor)
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: conn)
+
+    body, status = lt.calculate_distance_traveled(7)
+
+    assert status == 200
+    assert cursor.route_params == (12.9716, 77.5946, 7)
+    assert body['data']['distance_km'] == 4.26
+    assert body['data']['tracking_points'] == 3
+    assert not conn.rolled_back
+
+
+def test_distance_falls_back_to_python_when_sql_fails(monkeypatch):
+    cursor = DistanceCursor(
+        sql_error=psycopg2.DataError('value out of range'),
+        locations=[(13.0827, 80.2707), (None, None)],
+    )
+    conn = DistanceConn(cursor)
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: conn)
+
+    body, status = lt.calculate_distance_traveled(7)
+
+    assert status == 200
+    assert conn.rolled_back
+    assert body['data']['distance_km'] == pytest.approx(290.17, abs=0.01)
+    assert body['data']['route_segments'] == 2
+
+
+def test_nearby_points_share_one_geocode(monkeypatch):
+    from services import geocoding_service as geo
+
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+
+        def json(self):
+            return {'address': {'road': 'MG Road', 'city': 'Bengaluru'}}
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        calls.append(params)
+        return FakeResponse()
+
+    monkeypatch.setattr(geo.requests, 'get', fake_get)
+    geo.clear_geocoding_cache()
+
+    assert geo.peek_cached_address('12.97161', '77.59461') is None
+    assert geo.get_cached_address('12.97161', '77.59461') == 'MG Road, Bengaluru'
+    assert geo.get_cached_address('12.97158', '77.59459') == 'MG Road, Bengaluru'
+    assert geo.peek_cached_address('12.97162', '77.59462') == 'MG Road, Bengaluru'
+    assert len(calls) == 1
+    assert calls[0]['lat'] == '12.9716'
+
+    geo.clear_geocoding_cache()
+
+
+def test_rate_limited_geocodes_are_paced_and_not_cached(monkeypatch):
+    from services import geocoding_service as geo
+
+    statuses = [429, 200]
+    sleeps = []
+
+    class FakeResponse:
+        def __init__(self):
+            self.status_code = statuses.pop(0)
+
+        def json(self):
+            return {'address': {'road': 'MG Road', 'city': 'Bengaluru'}}
+
+    monkeypatch.setattr(geo.requests, 'get', lambda url, params=None, headers=None, timeout=None: FakeResponse())
+    monkeypatch.setattr(geo.time, 'monotonic', lambda: 1000.0)
+    monkeypatch.setattr(geo.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(geo, '_nominatim_last_request', 0.0)
+    geo.clear_geocoding_cache()
+
+    assert geo.lookup_cached_address('12.97161', '77.59461') is None
+    assert geo.peek_cached_address('12.97161', '77.59461') is None
+    assert geo.lookup_cached_address('12.97161', '77.59461') == 'MG Road, Bengaluru'
+    # The second request came within the same second and had to wait it out.
+    assert sleeps == [geo.NOMINATIM_MIN_INTERVAL_SECONDS]
+
+    geo.clear_geocoding_cache()
+
+
+class BulkCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return {'id': 7}
+
+    def close(self):
+        pass
+
+
+class BulkConn(DistanceConn):
+    def __init__(self):
+        super().__init__(BulkCursor(self))
+        self.committed = False
+
+    def commit(self):
+        self.committed = True
+
+
+def test_bulk_tracking_inserts_all_points_in_one_statement(monkeypatch):
+    conn = BulkConn()
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(lt, 'peek_cached_address', lambda lat, lon: 'Cached Street')
+
+    captured = {}
+
+    def fake_execute_values(cursor, sql, rows, page_size=None, fetch=False):
+        captured['rows'] = rows
+        return [{'id': 100 + i} for i in range(len(rows))]
+
+    monkeypatch.setattr(lt, 'execute_values', fake_execute_values)
+
+    body, status = lt.track_locations_bulk(7, 'e@example.com', [
+        {'latitude': '12.9716', 'longitude': '77.5946', 'tracked_at': '2026-01-05T10:00:00'},
+        {'latitude': '12.9720', 'longitude': '77.5950'},
+    ])
+
+    assert status == 201
+    assert conn.committed
+    assert body['data']['tracking_ids'] == [100, 101]
+    assert [row[3] for row in captured['rows']] == ['Cached Street', 'Cached Street']
+    assert captured['rows'][0][4].isoformat() == '2026-01-05T10:00:00'
+
+
+def test_bulk_tracking_geocodes_each_uncached_grid_cell_once(monkeypatch):
+    conn = BulkConn()
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(lt, 'peek_cached_address', lambda lat, lon: None)
+    monkeypatch.setattr(
+        lt, 'execute_values',
+        lambda cursor, sql, rows, page_size=None, fetch=False: [{'id': 100 + i} for i in range(len(rows))],
+    )
+
+    submitted = []
+
+    class RecordingExecutor:
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+
+    monkeypatch.setattr(lt, '_GEOCODE_EXECUTOR', RecordingExecutor())
+
+    body, status = lt.track_locations_bulk(7, 'e@example.com', [
+        {'latitude': '12.97161', 'longitude': '77.59461'},
+        {'latitude': '13.0827', 'longitude': '80.2707'},
+        {'latitude': '12.97158', 'longitude': '77.59459'},
+    ])
+
+    assert status == 201
+    assert submitted == [
+        (lt._fill_tracking_addresses, ([100, 102], '12.97161', '77.59461')),
+        (lt._fill_tracking_addresses, ([101], '13.0827', '80.2707')),
+    ]
+
+
+def test_bulk_tracking_rejects_points_without_coordinates():
+    body, status = lt.track_locations_bulk(7, 'e@example.com', [{'latitude': '12.9716'}])
+
+    assert status == 400
+    assert 'Point 0' in body['message']
+
+
+class ActiveCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def test_active_activity_cache_rereads_only_dirty_ids(monkeypatch):
+    from datetime import datetime
+
+    cursor = ActiveCursor([
+        {'id': 1, 'employee_email': 'a@example.com', 'activity_type': 'visit', 'start_time': datetime(2026, 1, 5, 9)},
+        {'id': 2, 'employee_email': 'b@example.com', 'activity_type': 'visit', 'start_time': datetime(2026, 1, 5, 10)},
+    ])
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: DistanceConn(cursor))
+    monkeypatch.setattr(lt, 'is_notify_subscribed', lambda channel: True)
+    monkeypatch.setattr(lt, 'start_active_activity_listener', lambda: None)
+    lt.invalidate_active_activity()
+
+    assert [a['id'] for a in lt._cached_active_activities()] == [2, 1]
+    assert cursor.executed[-1][0] is lt._SQL_ACTIVE_ACTIVITIES
+
+    # Clean cache: no query at all.
+    cursor.executed.clear()
+    assert len(lt._cached_active_activities()) == 2
+    assert cursor.executed == []
+
+    # Activity 2 ended: only its id is re-read and it drops out.
+    cursor.rows = []
+    lt._handle_activity_notify('2')
+    assert [a['id'] for a in lt._cached_active_activities()] == [1]
+    assert cursor.executed == [(lt._SQL_ACTIVE_ACTIVITIES_BY_ID, ([2],))]
+
+    lt.invalidate_active_activity()
+
+
+def test_active_activity_cache_resyncs_in_a_process_without_its_own_listener(monkeypatch):
+    cursor = ActiveCursor([])
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: DistanceConn(cursor))
+    monkeypatch.setattr(lt, 'start_active_activity_listener', lambda: None)
+    # No live LISTEN session in this process, e.g. a worker forked from a subscribed parent.
+    monkeypatch.setattr(lt, 'is_notify_subscribed', lambda channel: False)
+
+    lt._cached_active_activities()
+    lt._cached_active_activities()
+
+    assert [sql for sql, _ in cursor.executed] == [lt._SQL_ACTIVE_ACTIVITIES] * 2
+
+
+class BackfillCursor(ActiveCursor):
+    def __init__(self, batches):
+        super().__init__(None)
+        self.batches = batches
+
+    def fetchall(self):
+        return [{'id': i} for i in self.batches.pop(0)]
+
+
+class BackfillConn(DistanceConn):
+    def commit(self):
+        pass
+
+
+def test_coordinate_backfill_walks_ids_in_batches(monkeypatch):
+    cursor = BackfillCursor([[3, 5], [9], []])
+    monkeypatch.setattr(lt, 'get_db_connection', lambda: BackfillConn(cursor))
+    monkeypatch.setattr(lt, 'return_connection', lambda conn: None)
+
+    assert lt.backfill_tracking_coordinates(batch_size=2) == 3
+    assert [params for _, params in cursor.executed] == [(0, 2), (5, 2), (9, 2)]
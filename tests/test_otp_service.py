@@ -0,0 +1,75 @@
+from services import otp_service
+
+
+class OtpCursor:
+    def __init__(self, conn, result):
+        self.connection = conn
+        self.result = result
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class OtpConn:
+    def __init__(self, result):
+        self.cursor_obj = OtpCursor(self, result)
+        self.committed = False
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _verify(monkeypatch, result, otp="123456"):
+    conn = OtpConn(result)
+    monkeypatch.setattr(otp_service, "get_db_connection", lambda: conn)
+    return otp_service.verify_otp("E001", otp), conn
+
+
+def test_verify_otp_consumes_code_in_one_statement(monkeypatch):
+    verified, conn = _verify(monkeypatch, {"verified": True, "attempts": 1})
+
+    assert verified is True
+    assert conn.committed
+    executes = [params for sql, params in conn.cursor_obj.executed if sql.startswith("EXECUTE")]
+    assert executes == [("E001", "123456", otp_service.Config.OTP_MAX_ATTEMPTS)]
+
+
+def test_verify_otp_rejects_wrong_or_missing_code(monkeypatch):
+    assert _verify(monkeypatch, {"verified": False, "attempts": 2})[0] is False
+    assert _verify(monkeypatch, None)[0] is False
+
+
+def test_generate_otp_is_zero_padded_digits(monkeypatch):
+    monkeypatch.setattr(otp_service.secrets, "randbelow", lambda n: 42)
+
+    otp = otp_service.generate_otp()
+
+    assert otp == "42".zfill(otp_service.Config.OTP_LENGTH)
+    assert otp.isdigit()
+
+
+def test_save_otp_rotates_codes_in_one_statement(monkeypatch):
+    conn = OtpConn({"expires_at": "stored-expiry"})
+    monkeypatch.setattr(otp_service, "get_db_connection", lambda: conn)
+
+    assert otp_service.save_otp("E001", "123456") == "stored-expiry"
+    assert conn.committed
+    executes = [params for sql, params in conn.cursor_obj.executed if sql.startswith("EXECUTE")]
+    assert len(executes) == 1
+    assert executes[0][:3] == ("E001", "E001", "123456")
@@ -0,0 +1,54 @@
+import pytest
+
+from database.prepared import PreparedStatement, execute_prepared
+
+
+class FakeConnection:
+    pass
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+
+def test_prepared_statement_rewrites_placeholders():
+    statement = PreparedStatement(
+        "leave_by_id_mgr",
+        ("int", "text"),
+        "SELECT * FROM leaves WHERE id = %s AND manager_code = %s",
+    )
+
+    assert statement.prepare_sql == (
+        "PREPARE leave_by_id_mgr (int, text) AS "
+        "SELECT * FROM leaves WHERE id = $1 AND manager_code = $2"
+    )
+    assert statement.execute_sql == "EXECUTE leave_by_id_mgr (%s, %s)"
+
+
+def test_prepared_statement_rejects_placeholder_mismatch():
+    with pytest.raises(ValueError):
+        PreparedStatement("bad", ("int",), "SELECT %s, %s")
+
+
+def test_execute_prepared_prepares_once_per_connection():
+    statement = PreparedStatement("otp_by_emp", ("text",), "SELECT 1 WHERE %s IS NOT NULL")
+    first_conn = FakeConnection()
+    cursor = FakeCursor(first_conn)
+
+    execute_prepared(cursor, statement, ("E001",))
+    reused_cursor = FakeCursor(first_conn)
+    execute_prepared(reused_cursor, statement, ("E002",))
+    other_cursor = FakeCursor(FakeConnection())
+    execute_prepared(other_cursor, statement, ("E003",))
+
+    assert cursor.executed == [
+        (statement.prepare_sql, None),
+        ("EXECUTE otp_by_emp (%s)", ("E001",)),
+    ]
+    assert reused_cursor.executed == [("EXECUTE otp_by_emp (%s)", ("E002",))]
+    assert other_cursor.executed[0] == (statement.prepare_sql, None)
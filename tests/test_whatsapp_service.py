@@ -0,0 +1,274 @@
+import threading
+
+import pytest
+import requests
+
+import services.whatsapp_service as whatsapp_service
+
+
+def test_send_otp_async_sends_in_background_when_configured(monkeypatch):
+    monkeypatch.setattr(whatsapp_service, "_WHATSAPP_ENABLED", True)
+
+    calls = []
+    monkeypatch.setattr(whatsapp_service, "send_otp", lambda *args: calls.append(args) or True)
+
+    future = whatsapp_service.send_otp_async("9876543210", "123456", "Employee")
+
+    assert future.result(timeout=5) is True
+    assert calls == [("9876543210", "123456", "Employee")]
+
+
+def test_send_otp_async_skips_worker_in_dev_mode(monkeypatch):
+    monkeypatch.setattr(whatsapp_service, "_WHATSAPP_ENABLED", False)
+
+    assert whatsapp_service.send_otp_async("9876543210", "123456", "Employee") is None
+
+
+def test_send_otp_drops_button_after_buttonless_retry_succeeds(monkeypatch, whatsapp_session):
+    monkeypatch.setattr(whatsapp_service, "_HAS_BUTTON", True)
+    whatsapp_session.respond = lambda payload: (
+        (400, "Invalid BUTTON parameter") if len(payload["template"]["components"]) > 1 else 200
+    )
+
+    assert whatsapp_service.send_otp("9876543210", "123456", "Employee") is True
+    assert whatsapp_service.send_otp("9876543210", "654321", "Employee") is True
+    assert [len(p["template"]["components"]) for p in whatsapp_session.payloads] == [2, 1, 1]
+
+
+def test_leave_notifications_bulk_sends_concurrently_in_order(monkeypatch):
+    monkeypatch.setattr(whatsapp_service, "_WHATSAPP_ENABLED", True)
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_send(phone_number, **kwargs):
+        # Both sends must be in flight at once to pass the barrier.
+        barrier.wait()
+        return phone_number == "111"
+
+    monkeypatch.setattr(whatsapp_service, "send_leave_notification", fake_send)
+
+    assert whatsapp_service.send_leave_notifications_bulk([
+        {"phone_number": "111", "title": "t"},
+        {"phone_number": "222", "title": "t"},
+    ]) == [True, False]
+
+
+def test_breaker_opens_after_repeated_upstream_failures(monkeypatch, whatsapp_session):
+    clock = [1000.0]
+    monkeypatch.setattr(whatsapp_service.time, "monotonic", lambda: clock[0])
+    upstream = {"down": True}
+    whatsapp_session.respond = lambda payload: 503 if upstream["down"] else 200
+
+    for _ in range(whatsapp_service.BREAKER_FAILURE_THRESHOLD):
+        assert whatsapp_service.send_notification("9876543210", "hi") is False
+    posts = len(whatsapp_session.payloads)
+    assert posts == whatsapp_service.BREAKER_FAILURE_THRESHOLD * whatsapp_service.RETRY_MAX_ATTEMPTS
+
+    # Open: fails fast without touching the network.
+    assert whatsapp_service.send_notification("9876543210", "hi") is False
+    assert len(whatsapp_session.payloads) == posts
+
+    # After the cooldown one probe goes through and closes the breaker.
+    upstream["down"] = False
+    clock[0] += whatsapp_service.BREAKER_RESET_SECONDS
+    assert whatsapp_service.send_notification("9876543210", "hi") is True
+    assert whatsapp_service._breaker("12345").state == "closed"
+
+
+def test_unencodable_payload_does_not_take_the_half_open_probe(monkeypatch, whatsapp_session):
+    monkeypatch.setattr(whatsapp_service, "orjson", pytest.importorskip("orjson"))
+    clock = [1000.0]
+    monkeypatch.setattr(whatsapp_service.time, "monotonic", lambda: clock[0])
+
+    breaker = whatsapp_service._breaker("12345")
+    breaker.state, breaker.opened_at = "open", clock[0]
+    clock[0] += whatsapp_service.BREAKER_RESET_SECONDS
+
+    with pytest.raises(TypeError):
+        whatsapp_service._post({"to": object()})
+
+    assert breaker.state == "open"
+    assert breaker.allow() is True
+
+
+def test_post_retries_transient_errors_with_backoff(whatsapp_session):
+    outcomes = [
+        requests.exceptions.ConnectionError("reset"),
+        (429, b"", {"Retry-After": "2"}),
+        200,
+    ]
+    whatsapp_session.respond = lambda payload: outcomes.pop(0)
+
+    assert whatsapp_service._post({"to": "919876543210"}).status_code == 200
+    assert 0 <= whatsapp_session.sleeps[0] <= whatsapp_service.RETRY_BASE_SECONDS
+    assert whatsapp_session.sleeps[1] == 2.0
+
+
+def test_post_does_not_retry_auth_errors(whatsapp_session):
+    whatsapp_session.respond = lambda payload: 401
+
+    assert whatsapp_service._post({"to": "919876543210"}).status_code == 401
+    assert len(whatsapp_session.payloads) == 1
+
+
+@pytest.mark.parametrize("has_orjson", [True, False])
+def test_post_encodes_payload_once_for_all_attempts(monkeypatch, whatsapp_session, has_orjson):
+    if not has_orjson:
+        monkeypatch.setattr(whatsapp_service, "orjson", None)
+    elif whatsapp_service.orjson is None:
+        pytest.skip("orjson not installed")
+    whatsapp_session.respond = lambda payload: 503 if len(whatsapp_session.bodies) == 1 else 200
+
+    assert whatsapp_service._post({"to": "919876543210"}).status_code == 200
+    assert whatsapp_session.bodies[0] is whatsapp_session.bodies[1]
+    assert isinstance(whatsapp_session.bodies[0], bytes) is has_orjson
+    assert whatsapp_session.payloads[0] == {"to": "919876543210"}
+
+
+def test_send_falls_back_when_bulkhead_is_full(monkeypatch, whatsapp_session):
+    monkeypatch.setattr(whatsapp_service, "_BULKHEAD", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(whatsapp_service, "BULKHEAD_WAIT_SECONDS", 0.01)
+
+    whatsapp_service._BULKHEAD.acquire()
+    try:
+        assert whatsapp_service.send_notification("9876543210", "hi") is False
+    finally:
+        whatsapp_service._BULKHEAD.release()
+    assert whatsapp_session.payloads == []
+
+
+def test_token_bucket_waits_for_refill_once_burst_is_spent(monkeypatch):
+    clock = [0.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(whatsapp_service.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(whatsapp_service.time, "sleep", fake_sleep)
+
+    bucket = whatsapp_service._TokenBucket(rate=10, capacity=2)
+    for _ in range(3):
+        bucket.acquire()
+
+    assert sleeps == [pytest.approx(0.1)]
+
+
+def test_phone_formatter_applies_one_rule_for_every_sender():
+    assert whatsapp_service._format_phone("+91 98765-43210") == "919876543210"
+    assert whatsapp_service._format_phone("98765\t43210") == "919876543210"
+    # A local number that happens to begin with 91 still gets the prefix.
+    assert whatsapp_service._format_phone("9123456789") == "919123456789"
+
+    # Already formatted numbers come back as the same object.
+    formatted = "".join(["91", "9876543210"])
+    assert whatsapp_service._format_phone(formatted) is formatted
+    assert whatsapp_service._format_phone("91 9876543210") == "919876543210"
+
+
+def test_error_body_is_decoded_lazily_and_truncated():
+    limit = whatsapp_service._ERROR_BODY_BYTES
+    response = requests.Response()
+    response._content = b"x" * limit + b"button"
+    body = whatsapp_service._ErrorBody(response)
+
+    assert str(body) == "x" * limit
+    assert whatsapp_service._BUTTON_ERROR.search(b"Invalid BUTTON parameter") is not None
+
+
+def test_messages_url_and_headers_are_built_once_per_config_value():
+    assert whatsapp_service._messages_url("12345") is whatsapp_service._messages_url("12345")
+
+    headers = whatsapp_service._auth_headers("token")
+    assert headers is whatsapp_service._auth_headers("token")
+    assert headers["Authorization"] == "Bearer token"
+    with pytest.raises(TypeError):
+        headers["Authorization"] = "Bearer other"
+
+
+def test_session_resolves_environment_once():
+    assert whatsapp_service._SESSION.trust_env is False
+    assert whatsapp_service._messages_url("12345") == "https://graph.facebook.com/v19.0/12345/messages"
+
+
+def test_refresh_config_rereads_credentials(monkeypatch):
+    monkeypatch.setattr(whatsapp_service, "_WHATSAPP_ENABLED", False)
+    monkeypatch.setattr(whatsapp_service.Config, "WHATSAPP_TOKEN", "token")
+    monkeypatch.setattr(whatsapp_service.Config, "PHONE_NUMBER_ID", "12345")
+
+    whatsapp_service.refresh_config()
+    assert whatsapp_service._WHATSAPP_ENABLED is True
+
+    monkeypatch.setattr(whatsapp_service.Config, "WHATSAPP_TOKEN", "")
+    whatsapp_service.refresh_config()
+    assert whatsapp_service._WHATSAPP_ENABLED is False
+
+
+def test_leave_notification_builds_text_only_for_fallback(whatsapp_session):
+    whatsapp_session.respond = lambda payload: (
+        (400, "template rejected") if payload["type"] == "template" else 200
+    )
+
+    assert whatsapp_service.send_leave_notification(
+        "9876543210", "Leave Status Update", "Asha", "approved",
+        "05-01-2026", "06-01-2026", number_of_days=2,
+    ) is True
+    sent = whatsapp_session.payloads
+    assert [payload["type"] for payload in sent] == ["template", "text"]
+    assert sent[1]["text"]["body"].startswith(
+        "Hi Asha,\nYour leave request has been approved from 05-01-2026 to 06-01-2026 (2 days)."
+    )
+
+
+def test_leave_notification_dev_mode_builds_nothing(monkeypatch):
+    monkeypatch.setattr(whatsapp_service, "_WHATSAPP_ENABLED", False)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("dev mode should not format or send")
+
+    monkeypatch.setattr(whatsapp_service, "_format_phone", fail)
+    monkeypatch.setattr(whatsapp_service, "_post", fail)
+
+    assert whatsapp_service.send_leave_notification(
+        "9876543210", "Leave Status Update", "Asha", "approved", "05-01-2026", "06-01-2026",
+    ) is True
+
+
+def test_broadcast_sends_one_payload_per_recipient(whatsapp_session):
+    whatsapp_session.respond = lambda payload: 400 if payload["to"] == "911111111111" else 200
+
+    results = whatsapp_service.broadcast(
+        ["98765 43210", "1111111111"],
+        lambda recipient: {"type": "text", "text": {"body": f"Hello {recipient[-4:]}"}},
+    )
+
+    sent = {payload["to"]: payload for payload in whatsapp_session.payloads}
+    assert results == [True, False]
+    assert sent["919876543210"]["messaging_product"] == "whatsapp"
+    assert sent["919876543210"]["text"]["body"] == "Hello 3210"
+
+
+def test_retries_stop_at_the_send_deadline(monkeypatch, whatsapp_session):
+    clock = [1000.0]
+    timeouts = []
+    monkeypatch.setattr(whatsapp_service.time, "monotonic", lambda: clock[0])
+
+    def respond(payload):
+        # Every attempt burns most of the budget before failing.
+        clock[0] += whatsapp_service.SEND_DEADLINE_SECONDS - whatsapp_service.RETRY_MIN_ATTEMPT_SECONDS
+        return 503
+
+    real_post = whatsapp_session.post
+
+    def post(url, headers=None, json=None, data=None, timeout=None):
+        timeouts.append(timeout)
+        return real_post(url, headers=headers, json=json, data=data, timeout=timeout)
+
+    whatsapp_session.respond = respond
+    monkeypatch.setattr(whatsapp_session, "post", post)
+
+    assert whatsapp_service._post({"to": "919876543210"}).status_code == 503
+    assert len(whatsapp_session.payloads) == 1
+    assert timeouts == [whatsapp_service.SEND_DEADLINE_SECONDS]
+    assert whatsapp_session.sleeps == []